@@ -121,13 +121,13 @@ class MainframeCLI:
 
         return output
 
-    def display_screen(self):
+    async def display_screen(self):
         """Display current screen content"""
         if not self.connected:
             console.print("L Not connected", style="red")
             return
 
-        screen_content = self.client.get_screen()
+        screen_content = await self.client.get_screen()
         screen_info = self.parser.parse_screen(screen_content)
 
         # Create panel with screen content
@@ -217,7 +217,7 @@ class MainframeCLI:
                         console.print(" Logged off", style="green")
 
                 elif cmd == 'screen':
-                    self.display_screen()
+                    await self.display_screen()
 
                 elif cmd == 'clear':
                     if self.connected:
@@ -229,7 +229,7 @@ class MainframeCLI:
                     try:
                         pf_num = int(cmd[2:])
                         await self.client.send_pf(pf_num)
-                        self.display_screen()
+                        await self.display_screen()
                     except ValueError:
                         console.print("L Invalid PF key", style="red")
 
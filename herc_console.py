@@ -0,0 +1,121 @@
+"""
+Hercules Console Access
+Issues operator commands through the Hercules HTTP server (HTTPPORT 8038)
+"""
+
+import asyncio
+import logging
+import re
+import time
+import urllib.parse
+import urllib.request
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+CONSOLE_URL = "http://localhost:8038/cgi-bin/tasks/cmd"
+SYSLOG_URL = "http://localhost:8038/cgi-bin/tasks/syslog"
+
+# One Hercules log message line (HHCnnnnnX ...)
+_MESSAGE_LINE_RE = re.compile(r"^.*HHC\w+[IWESDA]\b.*$", re.MULTILINE)
+
+
+def _get(url: str, timeout: float) -> str:
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read().decode("latin-1")
+
+
+async def command(cmd: str, timeout: float = 5.0) -> Optional[str]:
+    """
+    Send a command to the Hercules console
+
+    Args:
+        cmd: Console command, e.g. "devinit 00c file.xmi ebcdic"
+        timeout: HTTP timeout in seconds
+
+    Returns:
+        Optional[str]: Console page returned by Hercules, None if unreachable
+    """
+    url = f"{CONSOLE_URL}?{urllib.parse.urlencode({'cmd': cmd})}"
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(None, _get, url, timeout)
+    except OSError as e:
+        logger.warning(f"Hercules console unavailable: {e}")
+        return None
+
+
+async def devinit(path: str, dev: str = "00c", mode: str = "ebcdic", timeout: float = 10.0) -> bool:
+    """
+    Load a file into a card reader and wait for Hercules to confirm it
+
+    Only syslog output written after the command is checked, so messages
+    left over from an earlier devinit cannot confirm (or fail) this one.
+
+    Args:
+        path: Host file to attach to the reader
+        dev: Device number
+        mode: Reader mode (ebcdic/ascii)
+        timeout: Maximum wait for the HHC...I "initialized" message
+
+    Returns:
+        bool: True if Hercules reported the device initialized
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        before = await loop.run_in_executor(None, _get, SYSLOG_URL, 5.0)
+    except OSError as e:
+        logger.warning(f"Hercules syslog unavailable: {e}")
+        return False
+
+    if await command(f"devinit {dev} {path} {mode}") is None:
+        return False
+
+    # HHC02245I 0:000C device initialized (Hercules 4) / HHCPN098I Device 000C initialized
+    device = rf"\b0*{re.escape(dev)}\b"
+    done = re.compile(rf"HHC\w*I\b.*{device}.*initiali[sz]ed", re.IGNORECASE)
+    # e.g. HHC01405E 0:000C Script file ... not found
+    failed = re.compile(rf"HHC\w*E\b.*{device}", re.IGNORECASE)
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            log = await loop.run_in_executor(None, _get, SYSLOG_URL, 5.0)
+        except OSError:
+            log = ""
+        new = _new_output(before, log)
+        error = failed.search(new)
+        if error:
+            logger.warning(f"devinit {dev} {path} failed: {error.group()}")
+            return False
+        if done.search(new):
+            logger.info(f"Device {dev} initialized with {path}")
+            return True
+        if time.monotonic() >= deadline:
+            logger.warning(f"No devinit confirmation for {dev} after {timeout:.0f}s")
+            return False
+        await asyncio.sleep(0.5)
+
+
+def _new_output(before: str, after: str) -> str:
+    """
+    Syslog messages written since `before` was read
+
+    The page is a rolling window, so older messages may have scrolled off
+    the top: the new ones are what follows the longest tail of `before`'s
+    messages that `after` starts with.
+
+    Args:
+        before: Syslog page read before the command
+        after: Syslog page read now
+
+    Returns:
+        str: New message lines, newline-separated
+    """
+    old = _MESSAGE_LINE_RE.findall(before)
+    new = _MESSAGE_LINE_RE.findall(after)
+    for dropped in range(len(old) + 1):
+        kept = len(old) - dropped
+        if new[:kept] == old[dropped:]:
+            return "\n".join(new[kept:])
+    return "\n".join(new)
@@ -3,11 +3,55 @@
 
 import curses
 import json
+import sys
 import time
 import threading
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple, List
+
+# Log level markers and the curses attribute used to render them
+_LOG_LEVEL_ATTRS = (
+    (" - ERROR - ", curses.A_BOLD),
+    (" - WARNING - ", curses.A_DIM),
+)
+
+
+def classify_log_line(line: str) -> int:
+    """Return the curses attribute for a log line"""
+    for needle, attr in _LOG_LEVEL_ATTRS:
+        if needle in line:
+            return attr
+    return curses.A_NORMAL
+
+
+class StatusFileCache:
+    """Re-parse status.json only when its contents actually change"""
+
+    def __init__(self, status_file: Path):
+        self.status_file = status_file
+        self._stat_key: Optional[Tuple[int, int]] = None
+        self._raw: Optional[bytes] = None
+        self._data: Optional[Dict[str, Any]] = None
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Return parsed status, or None if the file does not exist"""
+        try:
+            st = self.status_file.stat()
+        except OSError:
+            return None
+
+        # Cheap stat check first, then a byte compare before json.loads
+        stat_key = (st.st_mtime_ns, st.st_size)
+        if stat_key == self._stat_key and self._data is not None:
+            return self._data
+
+        raw = self.status_file.read_bytes()
+        self._stat_key = stat_key
+        if raw != self._raw or self._data is None:
+            self._data = json.loads(raw)
+            self._raw = raw
+        return self._data
 
 
 class MainframeViewer:
@@ -20,20 +64,20 @@ class MainframeViewer:
         self.screen_content = []
         self.log_lines = []
         self.max_log_lines = 10
+        self._status_cache = StatusFileCache(self.command_dir / "status.json")
 
     def load_status(self) -> Dict[str, Any]:
         """Load current status"""
-        status_file = self.command_dir / "status.json"
-        if status_file.exists():
-            try:
-                with open(status_file) as f:
-                    return json.load(f)
-            except:
-                pass
+        try:
+            status = self._status_cache.load()
+            if status is not None:
+                return status
+        except:
+            pass
         return {"state": "unknown"}
 
-    def load_logs(self):
-        """Load recent log entries"""
+    def load_logs(self) -> List[Tuple[str, int]]:
+        """Load recent log entries as (text, curses attribute) pairs"""
         log_dir = Path("~/herc/ai/logs").expanduser()
         if not log_dir.exists():
             return []
@@ -49,7 +93,14 @@ class MainframeViewer:
             all_lines = f.readlines()
             lines = all_lines[-self.max_log_lines:] if all_lines else []
 
-        return [line.strip() for line in lines]
+        # Lines still on screen from the last tick keep their attribute
+        known = dict(self.log_lines)
+        entries = []
+        for line in lines:
+            text = line.strip()
+            attr = known[text] if text in known else classify_log_line(text)
+            entries.append((text, attr))
+        return entries
 
     def draw_box(self, win, title: str):
         """Draw box with title"""
@@ -65,7 +116,7 @@ class MainframeViewer:
     def update_display(self, stdscr):
         """Update display panels"""
         curses.curs_set(0)  # Hide cursor
-        stdscr.nodelay(1)   # Non-blocking input
+        stdscr.timeout(1000)  # getch() waits up to 1s, returns early on input
         stdscr.clear()
 
         h, w = stdscr.getmaxyx()
@@ -127,16 +178,8 @@ class MainframeViewer:
                 log_win.clear()
                 self.draw_box(log_win, "Recent Activity")
 
-                for i, line in enumerate(self.log_lines):
+                for i, (line, attr) in enumerate(self.log_lines):
                     if i < log_h - 2:
-                        # Format log line
-                        if " - ERROR - " in line:
-                            attr = curses.A_BOLD
-                        elif " - WARNING - " in line:
-                            attr = curses.A_DIM
-                        else:
-                            attr = curses.A_NORMAL
-
                         # Truncate and display
                         display_line = line[:w - 4] if len(line) > w - 4 else line
                         try:
@@ -151,7 +194,7 @@ class MainframeViewer:
                 stdscr.addstr(h - 1, 2, help_text, curses.A_REVERSE)
                 stdscr.refresh()
 
-                # Handle input
+                # Handle input (also paces the update rate)
                 key = stdscr.getch()
                 if key == ord('q') or key == ord('Q'):
                     self.running = False
@@ -160,13 +203,11 @@ class MainframeViewer:
                 elif key == ord('c') or key == ord('C'):
                     self.log_lines = []
 
-                time.sleep(1)  # Update rate
-
             except curses.error:
                 pass  # Ignore curses errors
             except Exception as e:
-                # Show error in status
-                self.status["error"] = str(e)
+                # Show error in status (copy so the cached status stays clean)
+                self.status = {**self.status, "error": str(e)}
 
     def run(self):
         """Run viewer"""
@@ -186,6 +227,47 @@ class SimpleViewer:
 
     def __init__(self, command_dir: Optional[Path] = None):
         self.command_dir = Path(command_dir or "~/herc/ai/commands").expanduser()
+        self._status_cache = StatusFileCache(self.command_dir / "status.json")
+        self._prev_frame: List[str] = []
+
+    def build_frame(self, status: Dict[str, Any]) -> List[str]:
+        """Build the monitor output as a list of lines"""
+        frame = [
+            "=== Agent Status ===",
+            f"State: {status.get('state', 'unknown')}",
+            f"Last Action: {status.get('last_action', 'none')}",
+            f"Updated: {status.get('timestamp', 'never')}",
+        ]
+
+        if status.get('error'):
+            frame.append(f"ERROR: {status['error']}")
+
+        frame.extend(["", "=== Last Screen ==="])
+        if status.get('last_screen'):
+            lines = status['last_screen'].split('\n')[:10]
+            frame.extend(line[:78] for line in lines)  # Limit width
+
+        frame.extend(["", "[Refreshing every 2 seconds...]"])
+        return frame
+
+    def render(self, frame: List[str]):
+        """Repaint only the rows that differ from the previous frame"""
+        out = []
+        if not self._prev_frame:
+            # Clear screen once (portable)
+            out.append("\033[2J")
+
+        prev = self._prev_frame
+        for i in range(max(len(frame), len(prev))):
+            new_line = frame[i] if i < len(frame) else ""
+            if i >= len(prev) or new_line != prev[i]:
+                out.append(f"\033[{i + 1};1H\033[K{new_line}")
+
+        if out:
+            out.append(f"\033[{len(frame) + 1};1H")
+            sys.stdout.write("".join(out))
+            sys.stdout.flush()
+        self._prev_frame = frame
 
     def run(self):
         """Run simple viewer loop"""
@@ -194,30 +276,10 @@ class SimpleViewer:
 
         try:
             while True:
-                status_file = self.command_dir / "status.json"
-
-                if status_file.exists():
-                    with open(status_file) as f:
-                        status = json.load(f)
-
-                    # Clear screen (portable)
-                    print("\033[2J\033[H", end="")
-
-                    print("=== Agent Status ===")
-                    print(f"State: {status.get('state', 'unknown')}")
-                    print(f"Last Action: {status.get('last_action', 'none')}")
-                    print(f"Updated: {status.get('timestamp', 'never')}")
-
-                    if status.get('error'):
-                        print(f"ERROR: {status['error']}")
-
-                    print("\n=== Last Screen ===")
-                    if status.get('last_screen'):
-                        lines = status['last_screen'].split('\n')[:10]
-                        for line in lines:
-                            print(line[:78])  # Limit width
+                status = self._status_cache.load()
 
-                    print("\n[Refreshing every 2 seconds...]")
+                if status is not None:
+                    self.render(self.build_frame(status))
 
                 time.sleep(2)
 
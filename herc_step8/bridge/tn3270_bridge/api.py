@@ -1,7 +1,7 @@
 """HTTP API for TN3270 Bridge"""
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import uvicorn
@@ -14,29 +14,29 @@ from .session import S3270Session
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global session instance
-session: Optional[S3270Session] = None
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle"""
-    global session
-    # Startup
-    session = S3270Session()
-    session.start()
+    # Startup - the session lives on app.state for the lifetime of the app
+    app.state.session = S3270Session(trace_file=getattr(app.state, "trace_file", None))
+    app.state.session.start()
     logger.info("S3270 session started")
     yield
     # Shutdown
-    if session:
-        session.stop()
-        logger.info("S3270 session stopped")
+    app.state.session.stop()
+    logger.info("S3270 session stopped")
+
+def get_session(request: Request) -> S3270Session:
+    """Dependency returning the session created in lifespan"""
+    return request.app.state.session
 
 # Create FastAPI app
 app = FastAPI(
     title="TN3270 Bridge API",
     description="JSON API for s3270 automation",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Request/Response models
@@ -94,13 +94,8 @@ def redact_sensitive(data: Dict[str, Any]) -> Dict[str, Any]:
 
 # API Endpoints
 @app.post("/connect", response_model=StatusResponse)
-async def connect(request: ConnectRequest):
+async def connect(request: ConnectRequest, session: S3270Session = Depends(get_session)):
     """Connect to TN3270 host"""
-    global session
-
-    if not session:
-        raise HTTPException(status_code=500, detail="Session not initialized")
-
     # Validate localhost only
     if not request.host.startswith(("127.0.0.1:", "localhost:")):
         raise HTTPException(status_code=400, detail="Only localhost connections allowed")
@@ -116,13 +111,8 @@ async def connect(request: ConnectRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/disconnect", response_model=StatusResponse)
-async def disconnect():
+async def disconnect(session: S3270Session = Depends(get_session)):
     """Disconnect from host"""
-    global session
-
-    if not session:
-        raise HTTPException(status_code=500, detail="Session not initialized")
-
     try:
         session.disconnect()
         return StatusResponse(connected=False, status="Disconnected", message="Disconnected from host")
@@ -131,13 +121,8 @@ async def disconnect():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/actions")
-async def execute_actions(request: ActionsRequest):
+async def execute_actions(request: ActionsRequest, session: S3270Session = Depends(get_session)):
     """Execute raw s3270 actions"""
-    global session
-
-    if not session:
-        raise HTTPException(status_code=500, detail="Session not initialized")
-
     if not session.connected:
         raise HTTPException(status_code=400, detail="Not connected")
 
@@ -148,32 +133,22 @@ async def execute_actions(request: ActionsRequest):
         logger.error(f"Action execution error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/screen", response_model=ScreenResponse)
-async def get_screen():
+@app.get("/screen", responses={200: {"model": ScreenResponse}})
+async def get_screen(session: S3270Session = Depends(get_session)):
     """Get current screen snapshot"""
-    global session
-
-    if not session:
-        raise HTTPException(status_code=500, detail="Session not initialized")
-
     if not session.connected:
         raise HTTPException(status_code=400, detail="Not connected")
 
     try:
-        snapshot = session.snapshot()
-        return ScreenResponse(**snapshot)
+        # Already-serialized JSON; re-encoded only when the screen changes
+        return Response(content=session.snapshot_json(), media_type="application/json")
     except Exception as e:
         logger.error(f"Screen capture error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/fill")
-async def fill_field(request: FillRequest):
+async def fill_field(request: FillRequest, session: S3270Session = Depends(get_session)):
     """Fill field at position"""
-    global session
-
-    if not session:
-        raise HTTPException(status_code=500, detail="Session not initialized")
-
     if not session.connected:
         raise HTTPException(status_code=400, detail="Not connected")
 
@@ -189,13 +164,8 @@ async def fill_field(request: FillRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/press")
-async def press_key(request: PressRequest):
+async def press_key(request: PressRequest, session: S3270Session = Depends(get_session)):
     """Press AID key"""
-    global session
-
-    if not session:
-        raise HTTPException(status_code=500, detail="Session not initialized")
-
     if not session.connected:
         raise HTTPException(status_code=400, detail="Not connected")
 
@@ -207,13 +177,8 @@ async def press_key(request: PressRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/fill_by_label")
-async def fill_by_label(request: FillByLabelRequest):
+async def fill_by_label(request: FillByLabelRequest, session: S3270Session = Depends(get_session)):
     """Fill field by label"""
-    global session
-
-    if not session:
-        raise HTTPException(status_code=500, detail="Session not initialized")
-
     if not session.connected:
         raise HTTPException(status_code=400, detail="Not connected")
 
@@ -232,13 +197,8 @@ async def fill_by_label(request: FillByLabelRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/status", response_model=StatusResponse)
-async def get_status():
+async def get_status(session: S3270Session = Depends(get_session)):
     """Get connection status"""
-    global session
-
-    if not session:
-        return StatusResponse(connected=False, status="No session")
-
     return StatusResponse(
         connected=session.connected,
         status="Connected" if session.connected else "Disconnected"
@@ -264,14 +224,14 @@ async def root():
 
 def run_server(host: str = "127.0.0.1", port: int = 8080, trace: bool = False):
     """Run the API server"""
-    global session
-
     # Configure trace if requested
     if trace:
         import tempfile
         trace_file = tempfile.NamedTemporaryFile(prefix="s3270_", suffix=".trace", delete=False)
+        trace_file.close()  # s3270 writes it; only the name is needed
         logger.info(f"Trace file: {trace_file.name}")
-        session = S3270Session(trace_file=trace_file.name)
+        # Picked up by lifespan when it creates the session
+        app.state.trace_file = trace_file.name
 
     uvicorn.run(app, host=host, port=port, log_level="info")
 
@@ -1,18 +1,25 @@
 """Enhanced HTTP API for TN3270 Bridge with health and recovery"""
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import uvicorn
+import asyncio
+import concurrent.futures
+import itertools
 import logging
+import math
 import time
 import os
+import random
 import psutil
-from datetime import datetime
+import orjson
+from datetime import datetime, timezone
 from contextlib import asynccontextmanager
 
 from .session import S3270Session
+from .pool import S3270Pool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,14 +27,49 @@ logger = logging.getLogger(__name__)
 
 # Global session instance and metadata
 session: Optional[S3270Session] = None
+# Warm spare sessions so /reset_session does not pay s3270 start + connect
+_pool: Optional[S3270Pool] = None
+# Times are stored as epoch floats; ISO strings are derived on read
 session_metadata = {
-    "start_time": None,
+    "start_epoch": None,
     "last_action": None,
-    "last_action_time": None,
+    "last_action_epoch": None,
     "action_count": 0,
     "error_count": 0,
     "reconnect_count": 0
 }
+# Monotonic action numbers; action_count holds the latest one
+_action_seq = itertools.count(1)
+
+# s3270 calls block on a pipe; run them off the event loop. A single worker
+# keeps commands strictly ordered on the one s3270 process.
+_S3270_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="s3270")
+
+# Calls queued or running on the s3270 worker
+_s3270_pending = 0
+
+async def _run(fn, *args):
+    """Run a blocking session call on the s3270 worker thread"""
+    global _s3270_pending
+    _s3270_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_S3270_POOL, fn, *args)
+    finally:
+        _s3270_pending -= 1
+
+async def _send(command: str):
+    """Send an s3270 command without blocking the event loop"""
+    return await _run(session._send_command, command)
+
+# Short-lived /healthz cache so bursts of probes share one check
+_HEALTH_TTL = 1.0
+_health_cache = {"ts": 0.0, "payload": None, "status_code": 200}
+_hercules_pid: Optional[int] = None
+
+# Last /screen snapshot, valid until the next counted action and for at most
+# _SCREEN_TTL seconds, so host-driven updates (late replies, NOTIFY) show up
+_SCREEN_TTL = 0.25
+_screen_cache = {"key": -1, "ts": 0.0, "snapshot": None}
 
 # Action allowlist for safety
 ALLOWED_ACTIONS = [
@@ -35,35 +77,92 @@ ALLOWED_ACTIONS = [
     "Query", "MoveCursor", "String", "Enter", "PF", "PA", "Clear",
     "Disconnect", "Connect"
 ]
+# Tuple form lets str.startswith check every prefix in one call
+ALLOWED_PREFIXES = tuple(ALLOWED_ACTIONS)
+
+# Keys accepted by /press
+_VALID_KEYS = frozenset({
+    "Enter", "Clear",
+    *(f"PF{i}" for i in range(1, 13)),
+    *(f"PA{i}" for i in range(1, 4)),
+})
+
+def _find_hercules_pid() -> Optional[int]:
+    """Scan the process table for Hercules"""
+    for proc in psutil.process_iter(['pid', 'name']):
+        if 'hercules' in (proc.info['name'] or '').lower():
+            return proc.info['pid']
+    return None
+
+def _get_hercules_pid() -> Optional[int]:
+    """Return the cached Hercules PID, rescanning only if that process is gone"""
+    global _hercules_pid
+    if _hercules_pid is None or not psutil.pid_exists(_hercules_pid):
+        _hercules_pid = _find_hercules_pid()
+    return _hercules_pid
+
+def _backoff_delay(attempt: int, base: float = 0.5, cap: float = 10.0) -> float:
+    """Bounded exponential backoff with jitter, so retrying clients spread out"""
+    return min(cap, base * (2 ** attempt)) * random.uniform(0.5, 1.5)
+
+def _session_connected() -> bool:
+    """Connection state tracked in-process (no s3270 round trip)"""
+    return bool(
+        session is not None
+        and session.process
+        and session.process.poll() is None
+        and session.connected
+    )
+
+def _record(name: str, count: bool = True):
+    """Record the last action and, unless count=False, assign it the next action number"""
+    m = session_metadata
+    m["last_action"] = name
+    m["last_action_epoch"] = time.time()
+    if count:
+        m["action_count"] = next(_action_seq)
+
+def _iso(epoch: Optional[float]) -> Optional[str]:
+    """Format an epoch timestamp as an ISO-8601 UTC string"""
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).isoformat() if epoch else None
+
+def _metadata_view() -> dict:
+    """session_metadata with ISO start_time/last_action_time for responses"""
+    view = dict(session_metadata)
+    view["start_time"] = _iso(view.pop("start_epoch"))
+    view["last_action_time"] = _iso(view.pop("last_action_epoch"))
+    return view
 
 def validate_action(action: str) -> bool:
     """Validate action against allowlist"""
-    for allowed in ALLOWED_ACTIONS:
-        if action.startswith(allowed):
-            return True
-    return False
+    return action.startswith(ALLOWED_PREFIXES)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle"""
-    global session, session_metadata
+    global session, session_metadata, _pool
     # Startup
     session = S3270Session()
     session.start()
-    session_metadata["start_time"] = datetime.now().isoformat()
+    session_metadata["start_epoch"] = time.time()
     logger.info("Enhanced S3270 session started")
+    _pool = S3270Pool(size=int(os.environ.get("S3270_POOL_SIZE", "1")))
+    _pool.start()
     yield
     # Shutdown
+    await _pool.close()
     if session:
         session.stop()
         logger.info("S3270 session stopped")
+    _S3270_POOL.shutdown(wait=False)
 
 # Create FastAPI app
 app = FastAPI(
     title="TN3270 Bridge API (Enhanced)",
     description="Production-ready JSON API for s3270 automation",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Request/Response models
@@ -90,6 +189,12 @@ class FillByLabelRequest(BaseModel):
     value: str = Field(description="Text to fill")
     offset: int = Field(default=1, description="Field offset from label")
 
+class BatchRequest(BaseModel):
+    actions: List[Dict[str, Any]] = Field(
+        description="Steps run in order: press (aid), fill_at (row, col, value), "
+                    "fill_by_label (label, offset, value), sleep_ms (ms)"
+    )
+
 class WaitRequest(BaseModel):
     condition: str = Field(default="ready", description="Condition to wait for")
     timeout: int = Field(default=5000, description="Timeout in milliseconds")
@@ -100,46 +205,49 @@ async def health_check():
     """Health check endpoint with detailed status"""
     global session, session_metadata
 
+    now = time.monotonic()
+    if _health_cache["payload"] is not None and now - _health_cache["ts"] < _HEALTH_TTL:
+        return ORJSONResponse(content=_health_cache["payload"], status_code=_health_cache["status_code"])
+
     try:
         # Get Hercules process info
-        hercules_pid = None
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            if 'hercules' in proc.info['name'].lower():
-                hercules_pid = proc.info['pid']
-                break
+        hercules_pid = _get_hercules_pid()
 
-        # Check session status
-        connected = False
-        if session and session.process and session.process.poll() is None:
-            # Try to get status
+        # Check session status; on a cache miss with the s3270 worker idle,
+        # refresh the tracked state (the reply's status line updates
+        # session.connected). While a call such as a /wait_ready long poll
+        # holds the worker, answer from the tracked state instead of queueing.
+        if _s3270_pending == 0 and session and session.process and session.process.poll() is None:
             try:
-                session._send_command("Query(ConnectionState)")
-                connected = True
+                await _send("Query(ConnectionState)")
             except:
-                connected = False
+                pass
+        connected = _session_connected()
 
         health = {
             "status": "healthy" if connected else "degraded",
             "timestamp": datetime.now().isoformat(),
             "uptime_seconds": (
-                (datetime.now() - datetime.fromisoformat(session_metadata["start_time"])).total_seconds()
-                if session_metadata["start_time"] else 0
+                time.time() - session_metadata["start_epoch"]
+                if session_metadata["start_epoch"] else 0
             ),
             "hercules_pid": hercules_pid,
             "s3270_pid": session.process.pid if session and session.process else None,
             "connected": connected,
             "host": "127.0.0.1:3270",
             "last_action": session_metadata["last_action"],
-            "last_action_time": session_metadata["last_action_time"],
+            "last_action_time": _iso(session_metadata["last_action_epoch"]),
             "action_count": session_metadata["action_count"],
             "error_count": session_metadata["error_count"],
             "reconnect_count": session_metadata["reconnect_count"]
         }
 
-        return JSONResponse(content=health, status_code=200 if connected else 503)
+        status_code = 200 if connected else 503
+        _health_cache.update(ts=now, payload=health, status_code=status_code)
+        return ORJSONResponse(content=health, status_code=status_code)
 
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             content={"status": "unhealthy", "error": str(e)},
             status_code=503
         )
@@ -154,24 +262,25 @@ async def reset_session():
         # Disconnect if connected
         if session:
             try:
-                session._send_command("Disconnect()")
+                await _send("Disconnect()")
             except:
                 pass
 
-            # Stop and restart session
-            session.stop()
-            time.sleep(1)
-            session = S3270Session()
-            session.start()
+            # Swap in a warm session from the pool and stop the old one
+            old_session = session
+            session = await _pool.acquire()
+            await _run(old_session.stop)
 
-            # Reconnect
-            result = session._send_command("Connect(127.0.0.1:3270)")
-            session._send_command("Wait(InputField)")
+            # Reconnect if the warm session could not connect up front
+            if not session.connected:
+                result = await _send("Connect(127.0.0.1:3270)")
+                await _send("Wait(InputField)")
 
             # Update metadata
             session_metadata["reconnect_count"] += 1
-            session_metadata["last_action"] = "reset_session"
-            session_metadata["last_action_time"] = datetime.now().isoformat()
+            _health_cache["payload"] = None
+            _screen_cache["key"] = -1
+            _record("reset_session", count=False)
 
             return {"status": "reset", "message": "Session reset successfully"}
 
@@ -196,11 +305,9 @@ async def connect(request: ConnectRequest):
     try:
         if session.connected:
             # Already connected, just return current screen
-            session_metadata["last_action"] = "connect"
-            session_metadata["last_action_time"] = datetime.now().isoformat()
-            session_metadata["action_count"] += 1
+            _record("connect")
 
-            screen = session.snapshot()
+            screen = await _run(session.snapshot)
             return {
                 "status": "connected",
                 "message": f"Already connected to {request.host}",
@@ -210,26 +317,23 @@ async def connect(request: ConnectRequest):
         pass  # Session might not have connected attribute
 
     max_retries = 3
-    retry_delays = [2, 4, 8]
 
     for attempt in range(max_retries):
         try:
             # Use execute method instead of _send_command
-            result = session.execute(f"Connect({request.host})")
+            result = await _run(session.execute, f"Connect({request.host})")
 
             # Wait for connection - but with shorter timeout
-            session.execute("Wait(3,InputField)")
+            await _run(session.execute, "Wait(3,InputField)")
 
             # Mark as connected
             session.connected = True
 
             # Update metadata
-            session_metadata["last_action"] = "connect"
-            session_metadata["last_action_time"] = datetime.now().isoformat()
-            session_metadata["action_count"] += 1
+            _record("connect")
 
             # Get initial screen
-            screen = session.snapshot()
+            screen = await _run(session.snapshot)
 
             return {
                 "status": "connected",
@@ -239,34 +343,58 @@ async def connect(request: ConnectRequest):
 
         except Exception as e:
             if attempt < max_retries - 1:
-                time.sleep(retry_delays[attempt])
+                await asyncio.sleep(_backoff_delay(attempt))
                 continue
             else:
                 session_metadata["error_count"] += 1
                 raise HTTPException(status_code=500, detail=str(e))
 
+# Digest only, for cheap change checks
+@app.get("/digest")
+async def get_digest():
+    """Get the current screen digest without the full snapshot"""
+    if not session:
+        raise HTTPException(status_code=500, detail="Session not initialized")
+
+    try:
+        return {"digest": await _run(session.snapshot_digest)}
+    except Exception as e:
+        session_metadata["error_count"] += 1
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Get screen with keyboard lock detection
 @app.get("/screen")
-async def get_screen():
-    """Get current screen with keyboard lock status"""
+async def get_screen(request: Request):
+    """Get current screen with keyboard lock status
+
+    Repeated calls within _SCREEN_TTL seconds and no action in between reuse
+    the last snapshot; send 'Cache-Control: no-cache' to force a fresh capture.
+    """
     global session, session_metadata
 
     if not session:
         raise HTTPException(status_code=500, detail="Session not initialized")
 
     try:
-        screen = session.snapshot()
+        cache_key = session_metadata["action_count"]
+        now = time.monotonic()
+        use_cache = "no-cache" not in request.headers.get("cache-control", "")
 
-        # Check for keyboard lock
-        status = screen.get("status", "")
-        keyboard_locked = "L" in status or "X" in status
+        if use_cache and _screen_cache["key"] == cache_key and now - _screen_cache["ts"] <= _SCREEN_TTL:
+            screen = _screen_cache["snapshot"]
+        else:
+            screen = await _run(session.snapshot)
+
+            # Check for keyboard lock
+            status = screen.get("status", "")
+            keyboard_locked = "L" in status or "X" in status
 
-        # Add lock status
-        screen["keyboard_locked"] = keyboard_locked
+            # Add lock status
+            screen["keyboard_locked"] = keyboard_locked
+            _screen_cache.update(key=cache_key, ts=now, snapshot=screen)
 
         # Update metadata
-        session_metadata["last_action"] = "screen"
-        session_metadata["last_action_time"] = datetime.now().isoformat()
+        _record("screen", count=False)
 
         return screen
 
@@ -277,7 +405,7 @@ async def get_screen():
 # Execute actions with validation
 @app.post("/actions")
 async def execute_actions(request: ActionsRequest):
-    """Execute s3270 actions with validation"""
+    """Execute s3270 actions with validation, streaming one JSON line per action"""
     global session, session_metadata
 
     if not session:
@@ -285,39 +413,41 @@ async def execute_actions(request: ActionsRequest):
 
     # Validate actions if requested
     if request.validation_enabled:
+        rejected = next((a for a in request.actions if not a.startswith(ALLOWED_PREFIXES)), None)
+        if rejected is not None:
+            raise HTTPException(
+                status_code=403,
+                detail=f"Action not allowed: {rejected}"
+            )
+
+    async def stream_results():
+        # One NDJSON line per action, sent as soon as it completes
         for action in request.actions:
-            if not validate_action(action):
-                raise HTTPException(
-                    status_code=403,
-                    detail=f"Action not allowed: {action}"
-                )
+            try:
+                result = await _send(action)
+                item = {"action": action, "result": result, "status": "ok"}
 
-    results = []
-    for action in request.actions:
-        try:
-            result = session._send_command(action)
-            results.append({"action": action, "result": result, "status": "ok"})
+                # Update metadata
+                _record(action)
 
-            # Update metadata
-            session_metadata["last_action"] = action
-            session_metadata["last_action_time"] = datetime.now().isoformat()
-            session_metadata["action_count"] += 1
+            except Exception as e:
+                item = {"action": action, "error": str(e), "status": "error"}
+                session_metadata["error_count"] += 1
+                _screen_cache["key"] = -1
 
-        except Exception as e:
-            results.append({"action": action, "error": str(e), "status": "error"})
-            session_metadata["error_count"] += 1
+                # Check for keyboard lock
+                if "keyboard locked" in str(e).lower():
+                    # Try recovery
+                    try:
+                        await _send("Clear()")
+                        await asyncio.sleep(0.5)
+                        await _send("Reset()")
+                    except:
+                        pass
 
-            # Check for keyboard lock
-            if "keyboard locked" in str(e).lower():
-                # Try recovery
-                try:
-                    session._send_command("Clear()")
-                    time.sleep(0.5)
-                    session._send_command("Reset()")
-                except:
-                    pass
+            yield orjson.dumps(item, option=orjson.OPT_APPEND_NEWLINE)
 
-    return {"results": results}
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
 
 # Fill with automatic unlock
 @app.post("/fill")
@@ -330,15 +460,13 @@ async def fill(request: FillRequest):
 
     try:
         # Wait for keyboard unlock first
-        session._send_command("Wait(InputField)")
+        await _send("Wait(InputField)")
 
         # Move cursor and fill
-        result = session.fill_at(request.row, request.col, request.text, request.enter)
+        result = await _run(session.fill_at, request.row, request.col, request.text, request.enter)
 
         # Update metadata
-        session_metadata["last_action"] = f"fill@{request.row},{request.col}"
-        session_metadata["last_action_time"] = datetime.now().isoformat()
-        session_metadata["action_count"] += 1
+        _record(f"fill@{request.row},{request.col}")
 
         return result
 
@@ -348,8 +476,8 @@ async def fill(request: FillRequest):
         # Try keyboard recovery
         if "keyboard" in str(e).lower():
             try:
-                session._send_command("Clear()")
-                time.sleep(0.5)
+                await _send("Clear()")
+                await asyncio.sleep(0.5)
                 return {"status": "recovered", "message": "Keyboard unlocked"}
             except:
                 pass
@@ -371,23 +499,20 @@ async def press(request: PressRequest):
         raise HTTPException(status_code=400, detail="Must provide either 'key' or 'aid'")
 
     # Validate key
-    valid_keys = ["Enter", "Clear"] + [f"PF{i}" for i in range(1, 13)] + [f"PA{i}" for i in range(1, 4)]
-    if key_to_press not in valid_keys:
+    if key_to_press not in _VALID_KEYS:
         raise HTTPException(status_code=400, detail=f"Invalid key: {key_to_press}")
 
     try:
-        result = session._send_command(f"{key_to_press}()")
+        result = await _send(f"{key_to_press}()")
 
         # Update metadata
-        session_metadata["last_action"] = f"press_{key_to_press}"
-        session_metadata["last_action_time"] = datetime.now().isoformat()
-        session_metadata["action_count"] += 1
+        _record(f"press_{key_to_press}")
 
         # Wait for screen update
-        time.sleep(0.5)
+        await asyncio.sleep(0.5)
 
         # Return updated screen
-        screen = session.snapshot()
+        screen = await _run(session.snapshot)
         return {"status": "success", "key": key_to_press, "screen": screen}
 
     except Exception as e:
@@ -405,12 +530,10 @@ async def fill_by_label(request: FillByLabelRequest):
 
     try:
         # Use session's fill_by_label method
-        result = session.fill_by_label(request.label, request.offset, request.value)
+        result = await _run(session.fill_by_label, request.label, request.offset, request.value)
 
         # Update metadata
-        session_metadata["last_action"] = f"fill_by_label_{request.label}"
-        session_metadata["last_action_time"] = datetime.now().isoformat()
-        session_metadata["action_count"] += 1
+        _record(f"fill_by_label_{request.label}")
 
         if result:
             return {"status": "ok", "label": request.label, "value_length": len(request.value)}
@@ -421,6 +544,56 @@ async def fill_by_label(request: FillByLabelRequest):
         session_metadata["error_count"] += 1
         raise HTTPException(status_code=500, detail=str(e))
 
+# Batch of input steps with one snapshot at the end
+_BATCH_TYPES = frozenset({"press", "fill_at", "fill_by_label", "sleep_ms"})
+
+def _run_batch(actions: List[Dict[str, Any]]) -> Tuple[int, Optional[str]]:
+    """Run batch actions back to back (blocking); returns (completed, error)"""
+    for done, action in enumerate(actions):
+        kind = action["type"]
+        try:
+            if kind == "press":
+                session.execute(f"{action.get('aid', 'Enter')}()")
+                time.sleep(0.5)  # let the host repaint, as /press does
+            elif kind == "fill_at":
+                session.execute("Wait(InputField)")
+                session.fill_at(action["row"], action["col"], action.get("value", ""))
+            elif kind == "fill_by_label":
+                if not session.fill_by_label(action["label"], action.get("offset", 1), action.get("value", "")):
+                    return done, f"Label '{action['label']}' not found"
+            else:
+                time.sleep(action.get("ms", 1000) / 1000)
+        except Exception as e:
+            return done, str(e)
+    return len(actions), None
+
+@app.post("/batch")
+async def batch(request: BatchRequest):
+    """Run several input steps in one request and return the final screen"""
+    if not session:
+        raise HTTPException(status_code=500, detail="Session not initialized")
+
+    for action in request.actions:
+        kind = action.get("type")
+        if kind not in _BATCH_TYPES:
+            raise HTTPException(status_code=400, detail=f"Unsupported batch action: {kind}")
+        if kind == "press" and action.get("aid", "Enter") not in _VALID_KEYS:
+            raise HTTPException(status_code=400, detail=f"Invalid key: {action.get('aid')}")
+
+    completed, error = await _run(_run_batch, request.actions)
+    _record(f"batch_{completed}")
+    if error is not None:
+        session_metadata["error_count"] += 1
+
+    try:
+        screen = await _run(session.snapshot)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if error is not None:
+        return {"status": "error", "completed": completed, "error": error, "screen": screen}
+    return {"status": "ok", "completed": completed, "screen": screen}
+
 # Wait with timeout
 @app.post("/wait")
 async def wait(request: WaitRequest):
@@ -432,15 +605,15 @@ async def wait(request: WaitRequest):
 
     try:
         if request.condition == "ready":
-            result = session._send_command(f"Wait({request.timeout},InputField)")
+            result = await _send(f"Wait({request.timeout},InputField)")
         elif request.condition == "change":
-            result = session._send_command(f"Wait({request.timeout},Output)")
+            result = await _send(f"Wait({request.timeout},Output)")
         else:
-            result = session._send_command(f"Wait({request.timeout},{request.condition})")
+            result = await _send(f"Wait({request.timeout},{request.condition})")
 
         # Update metadata
-        session_metadata["last_action"] = f"wait_{request.condition}"
-        session_metadata["last_action_time"] = datetime.now().isoformat()
+        _record(f"wait_{request.condition}", count=False)
+        _screen_cache["key"] = -1
 
         return {"status": "ready", "condition": request.condition}
 
@@ -449,6 +622,55 @@ async def wait(request: WaitRequest):
             return {"status": "timeout", "condition": request.condition}
         raise HTTPException(status_code=500, detail=str(e))
 
+# Server-side long polls, so clients make one request per wait
+@app.post("/wait_ready")
+async def wait_ready(timeout_ms: int = 5000):
+    """Block until the keyboard accepts input or timeout_ms expires"""
+    if not session:
+        raise HTTPException(status_code=500, detail="Session not initialized")
+
+    secs = max(1, math.ceil(timeout_ms / 1000))
+    try:
+        result = await _run(session.execute, f"Wait({secs},InputField)", secs + 1)
+    except Exception as e:
+        session_metadata["error_count"] += 1
+        raise HTTPException(status_code=500, detail=str(e))
+
+    _record("wait_ready", count=False)
+    _screen_cache["key"] = -1
+
+    ready = "ok" in result and _session_connected()
+    return {"status": "ready" if ready else "timeout"}
+
+@app.post("/wait_change")
+async def wait_change(prev_digest: Optional[str] = None, timeout_ms: int = 5000):
+    """Block until the screen digest differs from prev_digest or timeout_ms expires"""
+    if not session:
+        raise HTTPException(status_code=500, detail="Session not initialized")
+
+    deadline = time.time() + timeout_ms / 1000
+    try:
+        while True:
+            digest = await _run(session.snapshot_digest)
+            remaining = deadline - time.time()
+            if digest != prev_digest or remaining <= 0:
+                break
+
+            # s3270 blocks until the host updates the screen
+            secs = max(1, math.ceil(remaining))
+            result = await _run(session.execute, f"Wait({secs},Output)", secs + 1)
+            if "ok" not in result:
+                # Timed out or not connected; report whatever is on screen now
+                digest = await _run(session.snapshot_digest)
+                break
+    except Exception as e:
+        session_metadata["error_count"] += 1
+        raise HTTPException(status_code=500, detail=str(e))
+
+    _record("wait_change", count=False)
+    _screen_cache["key"] = -1
+    return {"status": "changed" if digest != prev_digest else "timeout", "digest": digest}
+
 # Disconnect
 @app.post("/disconnect")
 async def disconnect():
@@ -459,11 +681,12 @@ async def disconnect():
         raise HTTPException(status_code=500, detail="Session not initialized")
 
     try:
-        result = session._send_command("Disconnect()")
+        result = await _send("Disconnect()")
+        session.connected = False
 
         # Update metadata
-        session_metadata["last_action"] = "disconnect"
-        session_metadata["last_action_time"] = datetime.now().isoformat()
+        _record("disconnect", count=False)
+        _screen_cache["key"] = -1
 
         return {"status": "disconnected"}
 
@@ -476,18 +699,13 @@ async def get_status():
     """Get session status"""
     global session, session_metadata
 
-    connected = False
-    if session and session.process and session.process.poll() is None:
-        try:
-            session._send_command("Query(ConnectionState)")
-            connected = True
-        except:
-            connected = False
+    connected = _session_connected()
 
     return {
         "connected": connected,
         "status": "Connected" if connected else "Disconnected",
-        "metadata": session_metadata
+        "hercules_pid": _get_hercules_pid(),
+        "metadata": _metadata_view()
     }
 
 def main():
@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 """CLI STDIO Interface - JSON input/output via stdin/stdout for LLM integration"""
 
-import json
+import re
 import sys
 import logging
 from typing import Dict, Any
 
+import orjson
+
 from .session import S3270Session
 
 # Configure logging to stderr so it doesn't interfere with JSON output
@@ -16,16 +18,35 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def redact_sensitive(data: Dict[str, Any]) -> Dict[str, Any]:
-    """Redact sensitive fields"""
-    sensitive_keys = ["pwd", "pass", "password", "passwd"]
-    redacted = data.copy()
+_LOCAL_HOST_PREFIXES = ("127.0.0.1:", "localhost:")
+
+# Static reply to the "help" command
+_HELP_RESPONSE = {
+    "type": "help",
+    "commands": [
+        {"type": "connect", "params": {"host": "127.0.0.1:3270"}},
+        {"type": "disconnect"},
+        {"type": "screen"},
+        {"type": "actions", "params": {"actions": ["Wait(3270)", "Ascii"]}},
+        {"type": "fill", "params": {"row": 1, "col": 1, "text": "...", "enter": False}},
+        {"type": "press", "params": {"aid": "Enter|PF1-24|PA1-3|Clear"}},
+        {"type": "fill_by_label", "params": {"label": "...", "offset": 1, "text": "..."}},
+        {"type": "status"},
+        {"type": "quit"}
+    ]
+}
+
+_SENSITIVE_RE = re.compile(r'pwd|pass|passwd|password', re.IGNORECASE)
 
-    for key in redacted:
-        if any(s in key.lower() for s in sensitive_keys):
-            redacted[key] = "***REDACTED***"
+def redact_sensitive(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Redact sensitive fields (returns data unchanged when there are none)"""
+    if not any(_SENSITIVE_RE.search(key) for key in data):
+        return data
 
-    return redacted
+    return {
+        key: "***REDACTED***" if _SENSITIVE_RE.search(key) else value
+        for key, value in data.items()
+    }
 
 def process_command(session: S3270Session, command: Dict[str, Any]) -> Dict[str, Any]:
     """Process a single command and return response"""
@@ -34,7 +55,7 @@ def process_command(session: S3270Session, command: Dict[str, Any]) -> Dict[str,
     try:
         if cmd_type == "connect":
             host = command.get("host", "127.0.0.1:3270")
-            if not host.startswith(("127.0.0.1:", "localhost:")):
+            if not host.startswith(_LOCAL_HOST_PREFIXES):
                 return {"error": "Only localhost connections allowed"}
 
             success = session.connect(host)
@@ -143,20 +164,7 @@ def process_command(session: S3270Session, command: Dict[str, Any]) -> Dict[str,
             }
 
         elif cmd_type == "help":
-            return {
-                "type": "help",
-                "commands": [
-                    {"type": "connect", "params": {"host": "127.0.0.1:3270"}},
-                    {"type": "disconnect"},
-                    {"type": "screen"},
-                    {"type": "actions", "params": {"actions": ["Wait(3270)", "Ascii"]}},
-                    {"type": "fill", "params": {"row": 1, "col": 1, "text": "...", "enter": False}},
-                    {"type": "press", "params": {"aid": "Enter|PF1-24|PA1-3|Clear"}},
-                    {"type": "fill_by_label", "params": {"label": "...", "offset": 1, "text": "..."}},
-                    {"type": "status"},
-                    {"type": "quit"}
-                ]
-            }
+            return _HELP_RESPONSE
 
         elif cmd_type == "quit":
             return {"type": "quit", "status": "Goodbye"}
@@ -168,10 +176,19 @@ def process_command(session: S3270Session, command: Dict[str, Any]) -> Dict[str,
         logger.error(f"Command error: {e}")
         return {"error": str(e)}
 
+def write_response(out, response: Dict[str, Any]):
+    """Write one JSON line to a binary stream and flush it"""
+    out.write(orjson.dumps(response, option=orjson.OPT_APPEND_NEWLINE))
+    out.flush()
+
 def main():
     """Main CLI loop"""
+    # Binary stdio: one encode and one write per message, no text-mode codec
+    out = sys.stdout.buffer
+    inp = sys.stdin.buffer
+
     logger.info("TN3270 Bridge CLI started (JSON stdio mode)")
-    print(json.dumps({"status": "ready", "version": "1.0.0"}), flush=True)
+    write_response(out, {"status": "ready", "version": "1.0.0"})
 
     # Create session
     trace = "--trace" in sys.argv
@@ -182,23 +199,23 @@ def main():
         while True:
             try:
                 # Read JSON command from stdin
-                line = sys.stdin.readline()
+                line = inp.readline()
                 if not line:
                     break
 
                 # Parse JSON
                 try:
-                    command = json.loads(line.strip())
-                except json.JSONDecodeError as e:
+                    command = orjson.loads(line)
+                except orjson.JSONDecodeError as e:
                     response = {"error": f"Invalid JSON: {e}"}
-                    print(json.dumps(response), flush=True)
+                    write_response(out, response)
                     continue
 
                 # Process command
                 response = process_command(session, command)
 
                 # Write JSON response to stdout
-                print(json.dumps(response), flush=True)
+                write_response(out, response)
 
                 # Check for quit
                 if command.get("type") == "quit":
@@ -209,7 +226,7 @@ def main():
             except Exception as e:
                 logger.error(f"Main loop error: {e}")
                 response = {"error": str(e)}
-                print(json.dumps(response), flush=True)
+                write_response(out, response)
 
     finally:
         session.stop()
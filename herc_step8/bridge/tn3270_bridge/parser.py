@@ -3,6 +3,23 @@
 import re
 from typing import List, Dict, Any, Optional, Tuple
 
+# key=value pairs inside an SF(c0=20,42=f2) start-field marker
+_ATTR_RE = re.compile(r'([^,=\s]+)\s*=\s*([^,\s]+)')
+
+# 3270 color codes (keys are lowercase)
+_COLOR_MAP = {
+    "f0": "neutral",
+    "f1": "blue",
+    "f2": "red",
+    "f3": "pink",
+    "f4": "green",
+    "f5": "turquoise",
+    "f6": "yellow",
+    "f7": "white",
+    "f8": "black",
+    "f9": "deep_blue"
+}
+
 def parse_readbuffer_ascii(lines: List[str], rows: int = 24, cols: int = 80) -> List[Dict[str, Any]]:
     """
     Parse ReadBuffer(Ascii) output to extract field information
@@ -12,71 +29,49 @@ def parse_readbuffer_ascii(lines: List[str], rows: int = 24, cols: int = 80) ->
     - len: Field length
     - protected: True if field is protected
     - attrs: Dictionary of attribute flags
+    - linear_start, linear_end: 0-based screen offsets, end exclusive
     """
-    fields = []
-    current_field = None
-    current_row = 1
-    current_col = 1
+    # (linear_start, attrs) per field; linear position = (row-1)*cols + (col-1)
+    starts: List[Tuple[int, Dict[str, Any]]] = []
+    row_base = 0
 
     for line in lines:
-        # Skip non-data lines
-        if not line or line in ["ok", "error"]:
+        # Skip non-data lines (status, "ok", "error"), then drop the prefix
+        if line[:5] != "data:":
             continue
-        if not line.startswith("data:"):
-            continue
-
-        # Remove "data:" prefix
         line = line[5:]
 
-        # Parse the line for SF(...) markers
-        col_offset = 0
-        for match in re.finditer(r'SF\(([^)]+)\)', line):
-            field_start = match.start()
-            attrs_str = match.group(1)
-
-            # If there's a current field, calculate its length
-            if current_field:
-                # Calculate field end position
-                field_end_row = current_row
-                field_end_col = col_offset + field_start
-
-                # Calculate total length
-                if field_end_row == current_field["row"]:
-                    current_field["len"] = field_end_col - current_field["col"]
-                else:
-                    # Field spans multiple lines
-                    current_field["len"] = (cols - current_field["col"] + 1) + \
-                                         ((field_end_row - current_field["row"] - 1) * cols) + \
-                                         field_end_col
-
-                fields.append(current_field)
-
-            # Parse attributes
-            attrs = parse_field_attributes(attrs_str)
-
-            # Create new field
-            current_field = {
-                "row": current_row,
-                "col": current_col + col_offset + field_start,
-                "len": 0,  # Will be calculated when we find the next field
-                "protected": attrs.get("protected", False),
-                "attrs": attrs
-            }
-
-            # Update column offset to account for SF marker
-            col_offset += len(match.group(0))
+        # Scan for SF(...) markers; markers take no screen cells, so the
+        # cell offset is the string offset minus marker characters seen so far
+        marker_chars = 0
+        pos = line.find("SF(")
+        while pos != -1:
+            end = line.find(")", pos + 3)
+            if end == -1:
+                break
+            attrs = parse_field_attributes(line[pos + 3:end])
+            starts.append((row_base + pos - marker_chars, attrs))
+            marker_chars += end + 1 - pos
+            pos = line.find("SF(", end + 1)
 
         # Move to next line
-        current_row += 1
-        current_col = 1
+        row_base += cols
 
-    # Add the last field if exists
-    if current_field:
-        # Estimate length to end of screen
-        remaining_on_line = cols - current_field["col"] + 1
-        remaining_lines = rows - current_field["row"]
-        current_field["len"] = remaining_on_line + (remaining_lines * cols)
-        fields.append(current_field)
+    # Field length runs to the next field start, the last one to end of screen
+    screen_end = rows * cols
+    fields = []
+    for i, (linear_start, attrs) in enumerate(starts):
+        next_start = starts[i + 1][0] if i + 1 < len(starts) else screen_end
+        row, col = divmod(linear_start, cols)
+        fields.append({
+            "row": row + 1,
+            "col": col + 1,
+            "len": next_start - linear_start,
+            "protected": attrs.get("protected", False),
+            "attrs": attrs,
+            "linear_start": linear_start,
+            "linear_end": next_start
+        })
 
     return fields
 
@@ -103,64 +98,50 @@ def parse_field_attributes(attrs_str: str) -> Dict[str, Any]:
     }
 
     # Parse key=value pairs
-    for pair in attrs_str.split(','):
-        pair = pair.strip()
-        if '=' in pair:
-            key, value = pair.split('=', 1)
-            key = key.strip()
-            value = value.strip()
-
-            if key == "c0":
-                # Parse character attribute byte
-                try:
-                    attr_byte = int(value, 16)
-                    attrs["protected"] = bool(attr_byte & 0x20)
-                    attrs["numeric"] = bool(attr_byte & 0x10)
-                    attrs["intensified"] = bool(attr_byte & 0x08)
-                    attrs["hidden"] = bool(attr_byte & 0x0C == 0x0C)
-                    attrs["detectable"] = bool(attr_byte & 0x04)
-                    attrs["modified"] = bool(attr_byte & 0x01)
-                except ValueError:
-                    pass
-
-            elif key == "41":
-                # Extended highlighting
-                attrs["highlighting"] = value
-
-            elif key == "42":
-                # Foreground color
-                attrs["fg_color"] = parse_color(value)
-
-            elif key == "45":
-                # Background color
-                attrs["bg_color"] = parse_color(value)
+    for match in _ATTR_RE.finditer(attrs_str):
+        key, value = match.groups()
+
+        if key == "c0":
+            # Parse character attribute byte
+            try:
+                attr_byte = int(value, 16)
+                attrs["protected"] = bool(attr_byte & 0x20)
+                attrs["numeric"] = bool(attr_byte & 0x10)
+                attrs["intensified"] = bool(attr_byte & 0x08)
+                attrs["hidden"] = bool(attr_byte & 0x0C == 0x0C)
+                attrs["detectable"] = bool(attr_byte & 0x04)
+                attrs["modified"] = bool(attr_byte & 0x01)
+            except ValueError:
+                pass
+
+        elif key == "41":
+            # Extended highlighting
+            attrs["highlighting"] = value
+
+        elif key == "42":
+            # Foreground color
+            attrs["fg_color"] = parse_color(value)
+
+        elif key == "45":
+            # Background color
+            attrs["bg_color"] = parse_color(value)
 
     return attrs
 
 def parse_color(color_code: str) -> str:
     """Parse 3270 color codes"""
-    colors = {
-        "f0": "neutral",
-        "f1": "blue",
-        "f2": "red",
-        "f3": "pink",
-        "f4": "green",
-        "f5": "turquoise",
-        "f6": "yellow",
-        "f7": "white",
-        "f8": "black",
-        "f9": "deep_blue"
-    }
-    return colors.get(color_code.lower(), color_code)
+    return _COLOR_MAP.get(color_code.lower(), color_code)
 
-def find_fields_at_position(fields: List[Dict[str, Any]], row: int, col: int) -> Optional[Dict[str, Any]]:
+def find_fields_at_position(
+    fields: List[Dict[str, Any]],
+    row: int,
+    col: int,
+    cols: int = 80
+) -> Optional[Dict[str, Any]]:
     """Find field at given position"""
+    pos = (row - 1) * cols + (col - 1)
     for field in fields:
-        field_start = (field["row"] - 1) * 80 + field["col"]
-        field_end = field_start + field["len"]
-        pos = (row - 1) * 80 + col
-
-        if field_start <= pos < field_end:
+        if field["linear_start"] <= pos < field["linear_end"]:
             return field
 
     return None
@@ -177,23 +158,21 @@ def find_field_by_preceding_text(
     """
     Find an unprotected field that follows a label in the screen text
     """
-    # Split screen into lines
-    lines = ascii_text.split('\n')
-
-    # Search for label
-    for row, line in enumerate(lines, 1):
-        if label in line:
-            # Found label, look for next unprotected field
-            label_col = line.index(label) + len(label)
-
-            # Check fields on same line first
-            for field in find_unprotected_fields(fields):
-                if field["row"] == row and field["col"] > label_col:
-                    return field
-
-            # Check fields on next lines
-            for field in find_unprotected_fields(fields):
-                if field["row"] > row:
-                    return field
-
-    return None
\ No newline at end of file
+    pos = ascii_text.find(label)
+    if pos == -1:
+        return None
+
+    # Convert the offset just past the label to a 1-based row and 0-based column
+    line_start = ascii_text.rfind('\n', 0, pos) + 1
+    row = ascii_text.count('\n', 0, pos) + 1
+    label_col = pos - line_start + len(label)
+
+    # Fields are in screen order: the first unprotected one after the label
+    # on the same line, otherwise the first on a later line
+    for field in fields:
+        if field["attrs"]["protected"]:
+            continue
+        if field["row"] > row or (field["row"] == row and field["col"] > label_col):
+            return field
+
+    return None
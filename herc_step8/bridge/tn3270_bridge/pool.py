@@ -0,0 +1,123 @@
+"""Warm S3270 session pool - pre-started, pre-connected sessions for fast handover"""
+
+import asyncio
+import logging
+from typing import Set
+
+from .session import S3270Session
+
+logger = logging.getLogger(__name__)
+
+class S3270Pool:
+    """Keeps `size` s3270 sessions started and sitting at Wait(InputField)
+
+    The bridge is stateful (a client fills and presses on the same screen),
+    so sessions are handed over rather than shared per request: acquire()
+    takes a warm session out of the pool and a replacement is warmed in the
+    background.
+    """
+
+    def __init__(self, size: int = 1, host: str = "127.0.0.1:3270"):
+        self.size = size
+        self.host = host
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._refills: Set[asyncio.Task] = set()
+        self._closed = False
+
+    def _warm_session(self) -> S3270Session:
+        """Start a session and connect it (blocking, run in an executor)"""
+        sess = S3270Session()
+        try:
+            sess.start()
+        except Exception:
+            self._stop_session(sess)
+            raise
+        try:
+            sess.execute(f"Connect({self.host})")
+            sess.execute("Wait(3,InputField)")
+            sess.connected = bool(sess.last_status and sess.last_status.connection_state == "C")
+        except Exception as e:
+            logger.warning(f"Warm session connect failed: {e}")
+        return sess
+
+    @staticmethod
+    def _stop_session(sess: S3270Session):
+        """Stop a session, logging instead of raising (blocking)"""
+        try:
+            sess.stop()
+        except Exception as e:
+            logger.warning(f"Error stopping pooled session: {e}")
+
+    @staticmethod
+    def _is_live(sess: S3270Session) -> bool:
+        """Check the s3270 process is running and refresh `connected` from its status (blocking)"""
+        if not sess.process or sess.process.poll() is not None:
+            return False
+        try:
+            sess.execute("Query(ConnectionState)")
+        except Exception as e:
+            logger.warning(f"Pooled session status check failed: {e}")
+            return False
+        return True
+
+    async def _add_one(self):
+        """Warm one session and put it in the pool"""
+        loop = asyncio.get_running_loop()
+        try:
+            sess = await loop.run_in_executor(None, self._warm_session)
+        except Exception as e:
+            logger.warning(f"Warming pooled session failed: {e}")
+            return
+        if self._closed:
+            # close() ran while this one was warming; nothing will hand it out
+            await loop.run_in_executor(None, self._stop_session, sess)
+            return
+        await self._idle.put(sess)
+
+    def _refill(self):
+        """Schedule a background refill"""
+        if self._closed:
+            return
+        task = asyncio.create_task(self._add_one())
+        self._refills.add(task)
+        task.add_done_callback(self._refills.discard)
+
+    def start(self):
+        """Begin warming the pool in the background"""
+        for _ in range(self.size):
+            self._refill()
+        logger.info(f"Warming S3270 pool with {self.size} session(s)")
+
+    async def acquire(self) -> S3270Session:
+        """Take a live warm session out of the pool (or start one inline) and schedule a replacement
+
+        Raises:
+            Exception: Whatever starting a session inline raised (e.g. s3270 missing)
+        """
+        loop = asyncio.get_running_loop()
+        sess = None
+        while sess is None and not self._idle.empty():
+            candidate = self._idle.get_nowait()
+            if await loop.run_in_executor(None, self._is_live, candidate):
+                sess = candidate
+            else:
+                await loop.run_in_executor(None, self._stop_session, candidate)
+
+        if sess is None:
+            logger.info("No warm S3270 session ready; starting one inline")
+            sess = await loop.run_in_executor(None, self._warm_session)
+
+        self._refill()
+        return sess
+
+    async def close(self):
+        """Stop refills and all idle sessions
+
+        Warm-ups already running in an executor thread cannot be cancelled, so
+        they are awaited and their sessions stopped rather than left orphaned.
+        """
+        self._closed = True
+        if self._refills:
+            await asyncio.gather(*self._refills, return_exceptions=True)
+        while not self._idle.empty():
+            self._stop_session(self._idle.get_nowait())
@@ -1,20 +1,52 @@
 """S3270 Session Manager - Manages persistent s3270 subprocess"""
 
+import os
+import selectors
 import subprocess
-import threading
-import queue
 import time
 import hashlib
 import re
-from typing import Dict, Any, Optional, List, Tuple
+from collections import deque
+from typing import Deque, Dict, Any, Optional, List, Tuple
 from dataclasses import dataclass
 import logging
 
+import orjson
+
+# The digest is a change detector, not a security boundary: prefer blake3
+try:
+    from blake3 import blake3 as _hasher
+except ImportError:
+    _hasher = hashlib.sha256
+
 logger = logging.getLogger(__name__)
 
+# Whitespace runs collapsed when normalizing screen text for the digest
+_WS_RE = re.compile(r'\s+')
+# Escapes for text inside an s3270 String("...") argument
+_STRING_ESCAPES = str.maketrans({'"': '\\"', '\\': '\\\\'})
+# s3270 status line: keyboard, formatting, protection, connection, emulator
+# mode, model, rows, cols, cursor row, cursor col, window id, exec time
+_STATUS_RE = re.compile(
+    r'([LUE])\s+([FU])\s+([PU])\s+(\S+)\s+(\S+)\s+(\S+)\s+'
+    r'(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\S+)\s+(\S+)'
+)
+
+def screen_digest(ascii_text: str) -> str:
+    """Hex digest of the whitespace-normalized screen text"""
+    return _hasher(_WS_RE.sub(' ', ascii_text.strip()).encode()).hexdigest()
+
 @dataclass
 class StatusLine:
     """Parsed s3270 status line"""
+    # Built for every s3270 reply; slots drop the per-instance __dict__.
+    # (No field has a default, so this works without dataclass(slots=True).)
+    __slots__ = (
+        "keyboard_state", "screen_formatting", "field_protection", "connection_state",
+        "emulator_mode", "model_number", "rows", "cols", "cursor_row", "cursor_col",
+        "window_id", "exec_time",
+    )
+
     keyboard_state: str  # L=locked, U=unlocked, E=error
     screen_formatting: str  # F=formatted, U=unformatted
     field_protection: str  # P=protected, U=unprotected
@@ -31,37 +63,28 @@ class StatusLine:
     @classmethod
     def parse(cls, line: str) -> 'StatusLine':
         """Parse s3270 status line format"""
-        parts = line.strip().split()
-        # Status lines should have at least 11 parts
-        if len(parts) < 11:
+        m = _STATUS_RE.match(line.strip())
+        if not m:
             raise ValueError(f"Invalid status line: {line}")
+        return cls.from_match(m)
 
-        # Parse dimensions and cursor position
-        try:
-            dims = parts[6].split(',') if len(parts) > 6 else ['24', '80']
-            rows = int(dims[0]) if dims[0] else 24
-            cols = int(dims[1]) if len(dims) > 1 and dims[1] else 80
-
-            cursor = parts[8].split(',') if len(parts) > 8 else ['0', '0']
-            cursor_row = int(cursor[0]) if cursor[0] else 0
-            cursor_col = int(cursor[1]) if len(cursor) > 1 and cursor[1] else 0
-        except (ValueError, IndexError):
-            rows, cols = 24, 80
-            cursor_row, cursor_col = 0, 0
-
+    @classmethod
+    def from_match(cls, m: 're.Match') -> 'StatusLine':
+        """Build a StatusLine from a _STATUS_RE match"""
+        kb, fmt, prot, conn, mode, model, rows, cols, crow, ccol, window, exec_time = m.groups()
         return cls(
-            keyboard_state=parts[0] if parts else 'U',
-            screen_formatting=parts[1] if len(parts) > 1 else 'F',
-            field_protection=parts[2] if len(parts) > 2 else 'U',
-            connection_state=parts[3][0] if len(parts) > 3 and '(' in parts[3] else parts[3] if len(parts) > 3 else 'N',
-            emulator_mode=parts[4] if len(parts) > 4 else 'N',
-            model_number=parts[5] if len(parts) > 5 else '2',
-            rows=rows,
-            cols=cols,
-            cursor_row=cursor_row,
-            cursor_col=cursor_col,
-            window_id=parts[9] if len(parts) > 9 else '0x0',
-            exec_time=float(parts[10]) if len(parts) > 10 else 0.0
+            keyboard_state=kb,
+            screen_formatting=fmt,
+            field_protection=prot,
+            connection_state=conn[0] if '(' in conn else conn,  # C(host) -> C
+            emulator_mode=mode,
+            model_number=model,
+            rows=int(rows),
+            cols=int(cols),
+            cursor_row=int(crow),
+            cursor_col=int(ccol),
+            window_id=window,
+            exec_time=0.0 if exec_time == '-' else float(exec_time)
         )
 
 class S3270Session:
@@ -70,12 +93,18 @@ class S3270Session:
     def __init__(self, trace_file: Optional[str] = None):
         """Initialize S3270 session"""
         self.process: Optional[subprocess.Popen] = None
-        self.reader_thread: Optional[threading.Thread] = None
-        self.output_queue: queue.Queue = queue.Queue()
+        # stdout is read in the calling thread: select for readiness, then
+        # os.read whatever is there; complete lines are queued in _lines
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._buf = bytearray()
+        self._lines: Deque[str] = deque()
+        self._eof = False
         self.trace_file = trace_file
         self.connected = False
         self.last_status: Optional[StatusLine] = None
         self.model = "3278-2"
+        self._last_ascii: Optional[str] = None
+        self._last_digest = ""
 
     def start(self):
         """Start s3270 subprocess"""
@@ -91,13 +120,15 @@ class S3270Session:
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1
+            bufsize=65536  # binary pipes; output is decoded per line
         )
 
-        # Start reader thread
-        self.reader_thread = threading.Thread(target=self._read_output, daemon=True)
-        self.reader_thread.start()
+        self._close_selector()
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.process.stdout, selectors.EVENT_READ)
+        self._buf.clear()
+        self._lines.clear()
+        self._eof = False
 
         # Wait for initial prompt
         time.sleep(0.1)
@@ -110,73 +141,125 @@ class S3270Session:
             self.process.terminate()
             self.process.wait(timeout=5)
             self.process = None
+        self._close_selector()
 
-    def _read_output(self):
-        """Read output from s3270 in background thread"""
-        while self.process and self.process.poll() is None:
-            try:
-                line = self.process.stdout.readline()
-                if line:
-                    # Handle both string and bytes, with proper EBCDIC decoding
-                    if isinstance(line, bytes):
-                        try:
-                            line = line.decode('utf-8')
-                        except UnicodeDecodeError:
-                            # Try EBCDIC encoding (code page 037)
-                            try:
-                                line = line.decode('cp037', errors='replace')
-                            except:
-                                # Fallback to latin-1 which accepts all byte values
-                                line = line.decode('latin-1', errors='replace')
-                    self.output_queue.put(line.strip())
-            except Exception as e:
-                logger.error(f"Reader thread error: {e}")
-                break
+    def _close_selector(self):
+        """Release the stdout selector, if any"""
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
 
-    def _send_command(self, command: str, timeout: float = 5.0) -> List[str]:
-        """Send command and collect response"""
+    @staticmethod
+    def _decode_line(raw: bytes) -> str:
+        """Decode one output line, falling back to EBCDIC (code page 037)"""
+        try:
+            return raw.decode('utf-8').strip()
+        except UnicodeDecodeError:
+            return raw.decode('cp037', errors='replace').strip()
+
+    def _fill(self, timeout: float) -> bool:
+        """Wait up to timeout for output and queue any complete lines
+
+        Returns False if nothing was read (timeout or end of output).
+        """
+        if self._eof or not self._selector.select(timeout):
+            return False
+
+        data = os.read(self.process.stdout.fileno(), 65536)
+        if not data:
+            self._eof = True
+            return False
+
+        self._buf += data
+        end = self._buf.rfind(b"\n")
+        if end != -1:
+            lines = bytes(self._buf[:end]).split(b"\n")
+            del self._buf[:end + 1]
+            self._lines.extend(self._decode_line(raw) for raw in lines)
+        return True
+
+    def _write(self, data: str):
+        """Drop stale output, then write to s3270"""
         if not self.process or self.process.poll() is not None:
             raise RuntimeError("s3270 process not running")
 
-        # Clear queue
-        while not self.output_queue.empty():
-            try:
-                self.output_queue.get_nowait()
-            except queue.Empty:
-                break
+        # Drop any stale output
+        while self._fill(0):
+            pass
+        self._buf.clear()
+        self._lines.clear()
 
-        # Send command
-        self.process.stdin.write(f"{command}\n")
+        self.process.stdin.write(data.encode())
         self.process.stdin.flush()
 
+    def _send_command(self, command: str, timeout: float = 5.0) -> List[str]:
+        """Send command and collect response"""
+        self._write(f"{command}\n")
+
         # Collect response
         response = []
-        start_time = time.time()
+        deadline = time.time() + timeout
         status_seen = False
 
-        while time.time() - start_time < timeout:
-            try:
-                line = self.output_queue.get(timeout=0.1)
-                response.append(line)
+        while True:
+            if not self._lines:
+                remaining = deadline - time.time()
+                if remaining <= 0 or self._eof:
+                    break
+                # After a status line, a short quiet gap also ends the reply
+                if not self._fill(min(remaining, 0.1) if status_seen else remaining) and status_seen:
+                    break
+                continue
 
-                # Check if this looks like a status line
-                if line and line[0] in "LUEFN" and len(line.split()) >= 12:
-                    try:
-                        self.last_status = StatusLine.parse(line)
-                        status_seen = True
-                    except ValueError:
-                        pass
+            line = self._lines.popleft()
+            response.append(line)
 
-                # "ok" or "error" indicates command completion
-                if line in ["ok", "error"]:
-                    break
+            if self._track_status(line):
+                status_seen = True
 
-            except queue.Empty:
-                if status_seen:
+            # "ok" or "error" indicates command completion
+            if line in ["ok", "error"]:
+                break
+
+        return response
+
+    def _track_status(self, line: str) -> bool:
+        """Update last_status/connected if line looks like a status line"""
+        m = _STATUS_RE.match(line)
+        if not m:
+            return False
+        try:
+            self.last_status = StatusLine.from_match(m)
+        except ValueError:
+            return False
+        self.connected = self.last_status.connection_state == "C"
+        return True
+
+    def _send_batch(self, commands: Tuple[str, ...], timeout: float = 5.0) -> List[List[str]]:
+        """Send several commands in one write and split the replies on ok/error"""
+        # Send all commands in a single write
+        self._write("".join(f"{command}\n" for command in commands))
+
+        # Collect one reply per command; "ok" or "error" ends each
+        responses: List[List[str]] = [[] for _ in commands]
+        current = 0
+        deadline = time.time() + timeout
+
+        while current < len(commands):
+            if not self._lines:
+                remaining = deadline - time.time()
+                if remaining <= 0 or self._eof:
                     break
+                self._fill(remaining)
                 continue
 
-        return response
+            line = self._lines.popleft()
+            responses[current].append(line)
+            self._track_status(line)
+            if line in ["ok", "error"]:
+                current += 1
+
+        return responses
 
     def connect(self, host: str = "127.0.0.1:3270") -> bool:
         """Connect to TN3270 host"""
@@ -210,9 +293,8 @@ class S3270Session:
 
     def send_text(self, text: str):
         """Send text string"""
-        # Escape special characters
-        text = text.replace('"', '\\"').replace('\\', '\\\\')
-        self._send_command(f'String("{text}")')
+        # Escape special characters in one pass
+        self._send_command(f'String("{text.translate(_STRING_ESCAPES)}")')
 
     def press(self, aid: str):
         """Press AID key (Enter, PF1-PF24, PA1-PA3, Clear)"""
@@ -246,21 +328,23 @@ class S3270Session:
         # Get screen to find label
         ascii_lines = self._send_command("Ascii")
 
-        # Search for label
-        for i, line in enumerate(ascii_lines):
-            if label in line:
-                # Found label, calculate position
-                col_pos = line.index(label) + len(label) + offset
-                row_pos = i + 1  # 1-based
+        # Search for label with one scan over the whole reply
+        ascii_text = "\n".join(ascii_lines)
+        idx = ascii_text.find(label)
+        if idx == -1:
+            return False
 
-                if col_pos > 80:  # Wrap to next line
-                    row_pos += col_pos // 80
-                    col_pos = col_pos % 80
+        # Found label, calculate position from the enclosing line
+        line_start = ascii_text.rfind("\n", 0, idx) + 1
+        col_pos = idx - line_start + len(label) + offset
+        row_pos = ascii_text.count("\n", 0, idx) + 1  # 1-based
 
-                self.fill_at(row_pos, col_pos, text)
-                return True
+        if col_pos > 80:  # Wrap to next line
+            row_pos += col_pos // 80
+            col_pos = col_pos % 80
 
-        return False
+        self.fill_at(row_pos, col_pos, text)
+        return True
 
     def execute(self, command: str, timeout: float = 5.0) -> List[str]:
         """Execute an s3270 command and return response
@@ -277,26 +361,38 @@ class S3270Session:
         """
         return self._send_command(command, timeout)
 
+    # Commands whose replies make up a snapshot, in the order _build_snapshot expects
+    _SNAPSHOT_COMMANDS = ("Snap(Save)", "Snap(Ascii)", "Query(Cursor)", "Query(ScreenCurSize)", "ReadBuffer(Ascii)")
+
     def snapshot(self) -> Dict[str, Any]:
-        """Capture complete screen state"""
-        # Save current state
-        self._send_command("Snap(Save)")
+        """Capture complete screen state (all commands written in one batch)"""
+        return self._build_snapshot(self._send_batch(self._SNAPSHOT_COMMANDS))
 
-        # Get ASCII representation
-        ascii_response = self._send_command("Snap(Ascii)")
+    def snapshot_digest(self) -> str:
+        """Screen digest only (skips the cursor, size and ReadBuffer queries)"""
+        _, ascii_response = self._send_batch(("Snap(Save)", "Snap(Ascii)"))
+        return self._digest_for(self._ascii_text(ascii_response))
 
-        # Filter out status lines and "ok"
-        ascii_lines = []
-        for line in ascii_response:
-            if line and not line.startswith("data:"):
-                continue
-            if line.startswith("data:"):
-                ascii_lines.append(line[5:])
+    @staticmethod
+    def _ascii_text(ascii_response: List[str]) -> str:
+        """Join the data lines of a Snap(Ascii) reply"""
+        # Only data lines carry screen text (skips status lines and "ok")
+        return "\n".join([line[5:] for line in ascii_response if line.startswith("data:")])
 
-        ascii_text = "\n".join(ascii_lines)
+    def _digest_for(self, ascii_text: str) -> str:
+        """Digest of ascii_text; it only changes when the screen text does"""
+        if ascii_text != self._last_ascii:
+            self._last_digest = screen_digest(ascii_text)
+            self._last_ascii = ascii_text
+        return self._last_digest
+
+    def _build_snapshot(self, responses: List[List[str]]) -> Dict[str, Any]:
+        """Build a snapshot dict from the replies to _SNAPSHOT_COMMANDS"""
+        _, ascii_response, cursor_response, size_response, readbuf_response = responses
+
+        ascii_text = self._ascii_text(ascii_response)
 
         # Get cursor position
-        cursor_response = self._send_command("Query(Cursor)")
         cursor_row, cursor_col = 0, 0
         for line in cursor_response:
             if "," in line and not line.startswith("U"):
@@ -305,11 +401,11 @@ class S3270Session:
                     try:
                         cursor_row = int(parts[0])
                         cursor_col = int(parts[1])
+                        break
                     except ValueError:
                         pass
 
         # Get screen size
-        size_response = self._send_command("Query(ScreenCurSize)")
         rows, cols = 24, 80
         for line in size_response:
             if "x" in line:
@@ -318,17 +414,15 @@ class S3270Session:
                     try:
                         rows = int(parts[0])
                         cols = int(parts[1])
+                        break
                     except ValueError:
                         pass
 
         # Get field data via ReadBuffer
         from .parser import parse_readbuffer_ascii
-        readbuf_response = self._send_command("ReadBuffer(Ascii)")
         fields = parse_readbuffer_ascii(readbuf_response, rows, cols)
 
-        # Calculate digest
-        normalized = re.sub(r'\s+', ' ', ascii_text.strip())
-        digest = hashlib.sha256(normalized.encode()).hexdigest()
+        digest = self._digest_for(ascii_text)
 
         return {
             "rows": rows,
@@ -339,6 +433,10 @@ class S3270Session:
             "digest": digest
         }
 
+    def snapshot_json(self) -> bytes:
+        """Capture screen state as JSON bytes"""
+        return orjson.dumps(self.snapshot())
+
     def execute_actions(self, actions: List[str]) -> List[str]:
         """Execute raw s3270 actions"""
         results = []
@@ -3,14 +3,17 @@
 
 import sys
 import os
+import functools
 import time
 import json
 import yaml
 import argparse
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
@@ -19,11 +22,27 @@ from screen_fingerprint import (
     normalize_screen,
     compute_digest,
     match_screen,
+    classify_screen,
     save_golden,
     assert_golden,
     get_field_at_label
 )
 
+# libyaml-backed loader when available
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+
+@functools.lru_cache(maxsize=128)
+def _load_flow(path_str: str, mtime: float) -> Dict[str, Any]:
+    """Parse a flow file; cached per path and mtime so edits are picked up"""
+    with open(path_str, 'r') as f:
+        return yaml.load(f, Loader=_Loader)
+
+# Input steps that can be sent to the bridge together via /batch
+_BATCH_STEPS = frozenset({"press", "fill_at", "fill_by_label", "sleep_ms"})
+
 class FlowRunner:
     """Executes flows via TN3270 Bridge API"""
 
@@ -31,17 +50,36 @@ class FlowRunner:
         """Initialize flow runner"""
         self.api_url = f"http://{host}"
         self.trace = trace
+        # One keep-alive connection to the bridge for the whole run
+        self.http = requests.Session()
+        self.http.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
         self.env_vars = {}
         self.current_digest = None
-        self.transcript = []
+        self.transcript = []  # entries logged before a transcript file is open
+        self._log_fh = None
+        self._log_file: Optional[Path] = None
         self.save_goldens_flag = False
         self.assert_goldens_flag = False
         self.flows_dir = Path.home() / "herc" / "flows"
         self.logs_dir = Path.home() / "herc" / "logs" / "flows"
         self.logs_dir.mkdir(parents=True, exist_ok=True)
+        # Step type -> handler, built once instead of an if/elif chain per step
+        self._dispatch = {
+            "wait_ready": self._step_wait_ready,
+            "wait_change": self._step_wait_change,
+            "press": self._step_press,
+            "fill_at": self._step_fill_at,
+            "fill_by_label": self._step_fill_by_label,
+            "assert_screen": self._step_assert_screen,
+            "assert_not_screen": self._step_assert_not_screen,
+            "snapshot": self._step_snapshot,
+            "golden:save": self._step_golden_save,
+            "golden:assert": self._step_golden_assert,
+            "sleep_ms": self._step_sleep_ms,
+        }
 
     def log_transcript(self, action: str, result: str = "", secret: bool = False):
-        """Add entry to transcript"""
+        """Add entry to transcript (written straight to the log once it is open)"""
         timestamp = datetime.now().isoformat()
 
         if secret and result:
@@ -54,25 +92,46 @@ class FlowRunner:
             'digest': self.current_digest[:16] if self.current_digest else None
         }
 
-        self.transcript.append(entry)
+        if self._log_fh is not None:
+            self._log_fh.write(self._format_entry(entry))
+        else:
+            self.transcript.append(entry)
 
         if self.trace:
             print(f"[{timestamp}] {action}: {result}")
 
-    def save_transcript(self, flow_name: str, success: bool = True):
-        """Save transcript to log file"""
+    @staticmethod
+    def _format_entry(entry: Dict[str, Any]) -> str:
+        """Format one transcript entry as a log line"""
+        line = f"[{entry['timestamp']}] {entry['action']}"
+        if entry['result']:
+            line += f": {entry['result']}"
+        if entry['digest']:
+            line += f" (digest: {entry['digest']}...)"
+        return line + "\n"
+
+    def start_transcript(self, flow_name: str) -> Path:
+        """Open the transcript log and flush any entries buffered so far"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        suffix = "" if success else "_fail"
-        log_file = self.logs_dir / f"{flow_name}_{timestamp}{suffix}.log"
-
-        with open(log_file, 'w') as f:
-            for entry in self.transcript:
-                f.write(f"[{entry['timestamp']}] {entry['action']}")
-                if entry['result']:
-                    f.write(f": {entry['result']}")
-                if entry['digest']:
-                    f.write(f" (digest: {entry['digest']}...)")
-                f.write("\n")
+        self._log_file = self.logs_dir / f"{flow_name}_{timestamp}.log"
+        self._log_fh = open(self._log_file, 'w', buffering=8192)
+        for entry in self.transcript:
+            self._log_fh.write(self._format_entry(entry))
+        self.transcript = []
+        return self._log_file
+
+    def save_transcript(self, flow_name: str, success: bool = True):
+        """Close the transcript log, renaming it with a _fail suffix on failure"""
+        if self._log_fh is None:
+            self.start_transcript(flow_name)
+
+        self._log_fh.close()
+        self._log_fh = None
+
+        log_file = self._log_file
+        if not success:
+            log_file = log_file.with_name(f"{log_file.stem}_fail{log_file.suffix}")
+            self._log_file.rename(log_file)
 
         return log_file
 
@@ -91,48 +150,45 @@ class FlowRunner:
 
     def get_screen(self) -> Dict[str, Any]:
         """Get current screen via API"""
-        response = requests.get(f"{self.api_url}/screen")
+        response = self.http.get(f"{self.api_url}/screen")
         response.raise_for_status()
-        snapshot = response.json()
+        snapshot = orjson.loads(response.content)
         self.current_digest = snapshot.get('digest')
         return snapshot
 
     def wait_ready(self, timeout_ms: int = 5000) -> bool:
-        """Wait for keyboard to be ready"""
-        start = time.time()
-        timeout = timeout_ms / 1000.0
-
-        while time.time() - start < timeout:
-            try:
-                # Check if connected
-                status = requests.get(f"{self.api_url}/status").json()
-                if status.get('connected'):
-                    return True
-            except:
-                pass
-            time.sleep(0.1)
-
-        return False
+        """Wait for keyboard to be ready (blocks server-side)"""
+        try:
+            response = self.http.post(
+                f"{self.api_url}/wait_ready",
+                params={"timeout_ms": timeout_ms},
+                timeout=timeout_ms / 1000.0 + 5
+            )
+            return response.status_code == 200 and response.json().get('status') == 'ready'
+        except requests.RequestException:
+            return False
 
     def wait_change(self, timeout_ms: int = 5000) -> bool:
-        """Wait for screen digest to change"""
-        start = time.time()
-        timeout = timeout_ms / 1000.0
-        initial_digest = self.current_digest
-
-        while time.time() - start < timeout:
-            snapshot = self.get_screen()
-            if snapshot.get('digest') != initial_digest:
-                return True
-            time.sleep(0.1)
-
-        return False
+        """Wait for screen digest to change (blocks server-side)"""
+        params = {"timeout_ms": timeout_ms}
+        if self.current_digest:
+            params["prev_digest"] = self.current_digest
+
+        response = self.http.post(
+            f"{self.api_url}/wait_change",
+            params=params,
+            timeout=timeout_ms / 1000.0 + 5
+        )
+        response.raise_for_status()
+        result = response.json()
+        self.current_digest = result.get('digest')
+        return result.get('status') == 'changed'
 
     def press(self, aid: str) -> bool:
         """Press AID key"""
         self.log_transcript(f"press: {aid}")
 
-        response = requests.post(
+        response = self.http.post(
             f"{self.api_url}/press",
             json={"key": aid}  # Changed from 'aid' to 'key' for api_enhanced compatibility
         )
@@ -144,7 +200,7 @@ class FlowRunner:
         display_value = "***REDACTED***" if secret else value
         self.log_transcript(f"fill_at: ({row},{col}) = {display_value}", secret=secret)
 
-        response = requests.post(
+        response = self.http.post(
             f"{self.api_url}/fill",
             json={"row": row, "col": col, "text": value, "enter": False}
         )
@@ -156,7 +212,7 @@ class FlowRunner:
         display_value = "***REDACTED***" if secret else value
         self.log_transcript(f"fill_by_label: {label}+{offset} = {display_value}", secret=secret)
 
-        response = requests.post(
+        response = self.http.post(
             f"{self.api_url}/fill_by_label",
             json={
                 "label": label,
@@ -168,119 +224,177 @@ class FlowRunner:
 
         return response.status_code == 200
 
-    def execute_step(self, step: Dict[str, Any]) -> bool:
-        """Execute a single flow step"""
-        # Get step type (first key)
-        step_type = list(step.keys())[0]
-        params = step[step_type] if isinstance(step[step_type], dict) else {}
+    def _step_value(self, params: Dict[str, Any]) -> str:
+        """Get a fill value from the environment or directly from the step"""
+        if 'value_env' in params:
+            return self.env_vars.get(params['value_env'], '')
+        return params.get('value', '')
+
+    def _batch_action(self, step_type: str, params: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+        """Translate an input step into a /batch action and its transcript entry"""
+        if step_type == "press":
+            aid = params.get('aid', 'Enter')
+            return {"type": "press", "aid": aid}, f"press: {aid}"
 
+        if step_type == "sleep_ms":
+            ms = params if isinstance(params, int) else params.get('ms', 1000)
+            return {"type": "sleep_ms", "ms": ms}, f"sleep: {ms}ms"
+
+        value = self._step_value(params)
+        display_value = "***REDACTED***" if params.get('secret', False) else value
+
+        if step_type == "fill_at":
+            return ({"type": "fill_at", "row": params['row'], "col": params['col'], "value": value},
+                    f"fill_at: ({params['row']},{params['col']}) = {display_value}")
+
+        offset = params.get('offset', 1)
+        return ({"type": "fill_by_label", "label": params['label'], "offset": offset, "value": value},
+                f"fill_by_label: {params['label']}+{offset} = {display_value}")
+
+    def execute_batch(self, steps: List[Dict[str, Any]]) -> int:
+        """Run consecutive input steps in one /batch request; returns how many succeeded"""
         try:
-            if step_type == "wait_ready":
-                timeout = params.get('timeout_ms', 5000)
-                success = self.wait_ready(timeout)
-                self.log_transcript(f"wait_ready: {timeout}ms", "ready" if success else "timeout")
-                return success
-
-            elif step_type == "wait_change":
-                timeout = params.get('timeout_ms', 5000)
-                success = self.wait_change(timeout)
-                self.log_transcript(f"wait_change: {timeout}ms", "changed" if success else "timeout")
-                return success
-
-            elif step_type == "press":
-                aid = params.get('aid', 'Enter')
-                return self.press(aid)
-
-            elif step_type == "fill_at":
-                row = params['row']
-                col = params['col']
-
-                # Get value from environment or direct
-                if 'value_env' in params:
-                    value = self.env_vars.get(params['value_env'], '')
-                else:
-                    value = params.get('value', '')
-
-                secret = params.get('secret', False)
-                return self.fill_at(row, col, value, secret)
-
-            elif step_type == "fill_by_label":
-                label = params['label']
-                offset = params.get('offset', 1)
-
-                # Get value from environment or direct
-                if 'value_env' in params:
-                    value = self.env_vars.get(params['value_env'], '')
-                else:
-                    value = params.get('value', '')
-
-                secret = params.get('secret', False)
-                return self.fill_by_label(label, offset, value, secret)
-
-            elif step_type == "assert_screen":
-                snapshot = self.get_screen()
-                matched, rule = match_screen(snapshot, params)
+            actions = []
+            entries = []
+            for step in steps:
+                step_type = next(iter(step))
+                params = step[step_type] if isinstance(step[step_type], dict) else {}
+                action, entry = self._batch_action(step_type, params)
+                actions.append(action)
+                entries.append(entry)
+
+            response = self.http.post(f"{self.api_url}/batch", json={"actions": actions})
+            result = orjson.loads(response.content)
+        except Exception as e:
+            self.log_transcript("batch", f"ERROR: {str(e)}")
+            return 0
+
+        if response.status_code != 200:
+            self.log_transcript("batch", f"ERROR: {result.get('detail', response.status_code)}")
+            return 0
+
+        # Log only the steps the bridge ran. current_digest is left as it was
+        # before the batch, so a following wait_change waits for the screen
+        # the batch's key press brings up, not for a change after it
+        completed = result.get('completed', 0)
+        for entry in entries[:completed]:
+            self.log_transcript(entry)
+        if result.get('status') != 'ok':
+            self.log_transcript("batch", f"ERROR: {result.get('error')}")
+        return completed
+
+    def _step_wait_ready(self, params: Dict[str, Any]) -> bool:
+        timeout = params.get('timeout_ms', 5000)
+        success = self.wait_ready(timeout)
+        self.log_transcript(f"wait_ready: {timeout}ms", "ready" if success else "timeout")
+        return success
+
+    def _step_wait_change(self, params: Dict[str, Any]) -> bool:
+        timeout = params.get('timeout_ms', 5000)
+        success = self.wait_change(timeout)
+        self.log_transcript(f"wait_change: {timeout}ms", "changed" if success else "timeout")
+        return success
+
+    def _step_press(self, params: Dict[str, Any]) -> bool:
+        aid = params.get('aid', 'Enter')
+        return self.press(aid)
+
+    def _step_fill_at(self, params: Dict[str, Any]) -> bool:
+        row = params['row']
+        col = params['col']
+
+        value = self._step_value(params)
+
+        secret = params.get('secret', False)
+        return self.fill_at(row, col, value, secret)
+
+    def _step_fill_by_label(self, params: Dict[str, Any]) -> bool:
+        label = params['label']
+        offset = params.get('offset', 1)
+
+        value = self._step_value(params)
+
+        secret = params.get('secret', False)
+        return self.fill_by_label(label, offset, value, secret)
+
+    def _step_assert_screen(self, params: Dict[str, Any]) -> bool:
+        snapshot = self.get_screen()
+        matched, rule = match_screen(snapshot, params)
 
-                if matched:
-                    self.log_transcript(f"assert_screen", f"matched: {rule}")
-                else:
-                    self.log_transcript(f"assert_screen", "FAILED")
-                    self.save_failure_screen("assert_fail", snapshot.get('ascii', ''))
+        if matched:
+            self.log_transcript(f"assert_screen", f"matched: {rule}")
+        else:
+            # Name the known screen we are on instead, if any
+            seen = ", ".join(classify_screen(snapshot)) or "unknown screen"
+            self.log_transcript(f"assert_screen", f"FAILED (on {seen})")
+            self.save_failure_screen("assert_fail", snapshot.get('ascii', ''))
 
-                return matched
+        return matched
 
-            elif step_type == "assert_not_screen":
-                snapshot = self.get_screen()
-                matched, rule = match_screen(snapshot, params)
+    def _step_assert_not_screen(self, params: Dict[str, Any]) -> bool:
+        snapshot = self.get_screen()
+        matched, rule = match_screen(snapshot, params)
 
-                if not matched:
-                    self.log_transcript(f"assert_not_screen", "passed")
-                else:
-                    self.log_transcript(f"assert_not_screen", f"FAILED: matched {rule}")
-                    self.save_failure_screen("assert_fail", snapshot.get('ascii', ''))
+        if not matched:
+            self.log_transcript(f"assert_not_screen", "passed")
+        else:
+            self.log_transcript(f"assert_not_screen", f"FAILED: matched {rule}")
+            self.save_failure_screen("assert_fail", snapshot.get('ascii', ''))
 
-                return not matched
+        return not matched
 
-            elif step_type == "snapshot":
-                name = params.get('name', 'snapshot')
-                snapshot = self.get_screen()
-                self.log_transcript(f"snapshot: {name}")
+    def _step_snapshot(self, params: Dict[str, Any]) -> bool:
+        name = params.get('name', 'snapshot')
+        snapshot = self.get_screen()
+        self.log_transcript(f"snapshot: {name}")
 
-                if self.save_goldens_flag:
-                    save_golden(name, snapshot)
+        if self.save_goldens_flag:
+            save_golden(name, snapshot)
 
-                return True
+        return True
 
-            elif step_type == "golden:save":
-                name = params['name']
-                snapshot = self.get_screen()
-                save_golden(name, snapshot)
-                self.log_transcript(f"golden:save: {name}")
-                return True
+    def _step_golden_save(self, params: Dict[str, Any]) -> bool:
+        name = params['name']
+        snapshot = self.get_screen()
+        save_golden(name, snapshot)
+        self.log_transcript(f"golden:save: {name}")
+        return True
 
-            elif step_type == "golden:assert":
-                name = params['name']
-                snapshot = self.get_screen()
-                matches, diff = assert_golden(name, snapshot)
+    def _step_golden_assert(self, params: Dict[str, Any]) -> bool:
+        name = params['name']
+        snapshot = self.get_screen()
+        matches, diff = assert_golden(name, snapshot)
 
-                if matches:
-                    self.log_transcript(f"golden:assert: {name}", "matches")
-                else:
-                    self.log_transcript(f"golden:assert: {name}", "FAILED")
-                    if self.trace:
-                        print(f"Diff:\n{diff}")
+        if matches:
+            self.log_transcript(f"golden:assert: {name}", "matches")
+        else:
+            self.log_transcript(f"golden:assert: {name}", "FAILED")
+            if self.trace:
+                print(f"Diff:\n{diff}")
 
-                return matches
+        return matches
 
-            elif step_type == "sleep_ms":
-                ms = params if isinstance(params, int) else params.get('ms', 1000)
-                time.sleep(ms / 1000.0)
-                self.log_transcript(f"sleep: {ms}ms")
-                return True
+    def _step_sleep_ms(self, params: Dict[str, Any]) -> bool:
+        ms = params if isinstance(params, int) else params.get('ms', 1000)
+        time.sleep(ms / 1000.0)
+        self.log_transcript(f"sleep: {ms}ms")
+        return True
 
-            else:
-                self.log_transcript(f"unknown step: {step_type}", "SKIPPED")
-                return True
+    def _step_unknown(self, step_type: str) -> bool:
+        self.log_transcript(f"unknown step: {step_type}", "SKIPPED")
+        return True
+
+    def execute_step(self, step: Dict[str, Any]) -> bool:
+        """Execute a single flow step"""
+        # Get step type (first key)
+        step_type = next(iter(step))
+        params = step[step_type] if isinstance(step[step_type], dict) else {}
+
+        try:
+            handler = self._dispatch.get(step_type)
+            if handler is None:
+                return self._step_unknown(step_type)
+            return handler(params)
 
         except Exception as e:
             self.log_transcript(f"{step_type}", f"ERROR: {str(e)}")
@@ -296,20 +410,34 @@ class FlowRunner:
             for import_file in flow['imports']:
                 import_path = self.flows_dir / import_file
                 if import_path.exists():
-                    with open(import_path, 'r') as f:
-                        imported = yaml.safe_load(f)
+                    imported = _load_flow(str(import_path), import_path.stat().st_mtime)
 
                     self.log_transcript(f"Importing: {import_file}")
                     if not self.execute_flow(imported):
                         return False
 
-        # Execute steps
+        # Execute steps; runs of consecutive input steps go to /batch together
         steps = flow.get('steps', [])
-        for i, step in enumerate(steps):
-            if not self.execute_step(step):
+        i = 0
+        while i < len(steps):
+            end = i
+            while end < len(steps) and next(iter(steps[end])) in _BATCH_STEPS:
+                end += 1
+
+            if end - i > 1:
+                completed = self.execute_batch(steps[i:end])
+                ok = completed == end - i
+                i += completed  # on failure, i is now the failed step
+            else:
+                ok = self.execute_step(steps[i])
+                if ok:
+                    i += 1
+
+            if not ok:
                 # Check for recovery actions
                 if 'recovery' in flow:
                     if self.handle_recovery(flow['recovery']):
+                        i += 1
                         continue
 
                 self.log_transcript(f"Flow failed at step {i+1}")
@@ -338,7 +466,7 @@ class FlowRunner:
 
     def connect(self) -> bool:
         """Connect to mainframe"""
-        response = requests.post(
+        response = self.http.post(
             f"{self.api_url}/connect",
             json={"host": "127.0.0.1:3270"}
         )
@@ -351,7 +479,7 @@ class FlowRunner:
 
     def disconnect(self):
         """Disconnect from mainframe"""
-        requests.post(f"{self.api_url}/disconnect")
+        self.http.post(f"{self.api_url}/disconnect")
         self.log_transcript("Disconnected")
 
     def run(self, flow_file: Path, env: Dict[str, str] = None,
@@ -362,10 +490,10 @@ class FlowRunner:
         self.assert_goldens_flag = assert_goldens
 
         # Load flow
-        with open(flow_file, 'r') as f:
-            flow = yaml.safe_load(f)
+        flow = _load_flow(str(flow_file), flow_file.stat().st_mtime)
 
         flow_name = flow_file.stem
+        self.start_transcript(flow_name)
 
         try:
             # Connect
@@ -399,6 +527,14 @@ class FlowRunner:
 
         finally:
             self.disconnect()
+            self.close()
+            if self._log_fh is not None:
+                # Returned early (e.g. connect failed) without saving
+                self.save_transcript(flow_name, False)
+
+    def close(self):
+        """Close the HTTP session"""
+        self.http.close()
 
 def main():
     """CLI entry point"""
@@ -1,27 +1,145 @@
 #!/usr/bin/env python3
 """Replay harness for regression testing with golden screens"""
 
-import json
+import orjson
+import mmap
+import re
 import sys
-import difflib
+from array import array
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import hashlib
 import argparse
 
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from screen_fingerprint import screen_diff
+
+
+# Every mock action succeeds; one shared, read-only result
+_ACTION_RESULT = {"status": "success", "mock": True}
+
+# All goldens of a directory packed into one file (see pack_goldens)
+_GOLDEN_PACK = "goldens.pack"
+
+# Leading bytes of a golden file searched for its digest before a full parse
+_GOLDEN_HEAD_BYTES = 256
+_DIGEST_HEAD_RE = re.compile(rb'"digest"\s*:\s*"([0-9a-f]+)"')
+
+# Longer golden screens (merged dumps) are not interned
+_INTERN_MAX_CHARS = 4096
+
+# Steps of replay output buffered between writes to stdout
+_LOG_FLUSH_STEPS = 256
+
+
+def short_digest(text: str) -> str:
+    """First 64 bits of the SHA256 of text, as 16 hex chars (transcript digest format)"""
+    return hashlib.sha256(text.encode()).digest()[:8].hex()
+
+
+def screen_dims(screen: str) -> Tuple[int, int]:
+    """(rows, widest line) of a screen, from a single split"""
+    lines = screen.split('\n')
+    return len(lines), max(map(len, lines))
+
+
+def iter_jsonl(path: Path):
+    """Yield one parsed record per non-blank line of a JSONL file"""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield orjson.loads(line)
+
+
+def pack_goldens(golden_dir: Path) -> Path:
+    """Write every *.json golden in golden_dir into a single pack file"""
+    golden_dir = Path(golden_dir)
+    goldens = {f.stem: orjson.loads(f.read_bytes()) for f in golden_dir.glob("*.json")}
+    pack_file = golden_dir / _GOLDEN_PACK
+    pack_file.write_bytes(orjson.dumps(goldens))
+    print(f"Packed {len(goldens)} goldens into {pack_file}")
+    return pack_file
+
+
+def _fresh_pack(golden_dir: Path) -> Optional[Path]:
+    """The pack file, if it exists and no golden was added, removed or edited since"""
+    pack_file = golden_dir / _GOLDEN_PACK
+    try:
+        packed_at = pack_file.stat().st_mtime_ns
+    except OSError:
+        return None
+    if golden_dir.stat().st_mtime_ns > packed_at:
+        return None
+    for golden_file in golden_dir.glob("*.json"):
+        if golden_file.stat().st_mtime_ns > packed_at:
+            return None
+    return pack_file
+
+
+class TranscriptIndex:
+    """Random access to the steps of a JSONL transcript through an mmap
+
+    Line offsets are found in one pass; steps are parsed when accessed.
+    """
+
+    _LINE_RE = re.compile(rb'^.*\S.*$', re.M)  # non-blank lines
+
+    def __init__(self, path: Path):
+        self._starts = array('Q')
+        self._ends = array('Q')
+        self._mm = None
+        with open(path, 'rb') as f:
+            if f.seek(0, 2):  # mmap refuses empty files
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm is not None:
+            for m in self._LINE_RE.finditer(self._mm):
+                self._starts.append(m.start())
+                self._ends.append(m.end())
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        return orjson.loads(self._mm[self._starts[i]:self._ends[i]])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
 
 class MockBridge:
     """Mock TN3270 bridge for offline replay"""
 
-    def __init__(self, transcript_file: Path = None, golden_dir: Path = None):
+    def __init__(self, transcript_file: Path = None, golden_dir: Path = None,
+                 transcript=None):
         self.transcript = []
         self.golden_screens = {}
+        self.golden_by_prefix = {}
+        self.screen_digests = {}  # screen ascii -> short_digest
         self.current_step = 0
         self.current_screen = None
-
-        # Load transcript if provided
-        if transcript_file and transcript_file.exists():
+        self._screen_result = None
+        self._last_ascii: Optional[str] = None
+        self._last_digest: Optional[str] = None
+
+        # Use an already-parsed transcript, otherwise load it from disk
+        if transcript is not None:
+            self.transcript = transcript
+        elif transcript_file and transcript_file.exists():
             self.load_transcript(transcript_file)
 
         # Load golden screens if provided
@@ -30,27 +148,87 @@ class MockBridge:
 
     def load_transcript(self, transcript_file: Path):
         """Load JSONL transcript"""
-        self.transcript = []
-        with open(transcript_file) as f:
-            for line in f:
-                if line.strip():
-                    self.transcript.append(json.loads(line))
+        self.transcript = list(iter_jsonl(transcript_file))
         print(f"Loaded {len(self.transcript)} steps from transcript")
 
     def load_goldens(self, golden_dir: Path):
         """Load golden screens"""
         self.golden_screens = {}
-        for golden_file in golden_dir.glob("*.json"):
-            with open(golden_file) as f:
-                data = json.load(f)
-                name = golden_file.stem
-                self.golden_screens[name] = data
+        self.golden_by_prefix = {}
+        self.screen_digests = {}
+
+        # One parse of the pack file when it is current, else one per golden
+        pack_file = _fresh_pack(golden_dir)
+        if pack_file is not None:
+            for name, golden in orjson.loads(pack_file.read_bytes()).items():
+                self.add_golden(name, golden)
+        else:
+            for golden_file in golden_dir.glob("*.json"):
+                self.add_golden(golden_file.stem, self._read_golden_head(golden_file))
         print(f"Loaded {len(self.golden_screens)} golden screens")
 
+    @staticmethod
+    def _read_golden_head(golden_file: Path) -> Dict[str, Any]:
+        """Golden with only its digest, when the digest is in the file's first bytes
+
+        The rest is parsed by _hydrate the first time the screen is used.
+        """
+        with open(golden_file, 'rb') as f:
+            head = f.read(_GOLDEN_HEAD_BYTES)
+            if len(head) == _GOLDEN_HEAD_BYTES:
+                m = _DIGEST_HEAD_RE.search(head)
+                if m:
+                    return {"digest": m.group(1).decode(), "_path": golden_file}
+                head += f.read()
+        return orjson.loads(head)
+
+    @staticmethod
+    def _intern_screen(golden: Dict[str, Any]):
+        """Goldens often repeat the same screen; share one string per screen"""
+        if isinstance(golden.get("ascii"), str) and len(golden["ascii"]) < _INTERN_MAX_CHARS:
+            golden["ascii"] = sys.intern(golden["ascii"])
+
+    def _hydrate(self, golden: Dict[str, Any]) -> Dict[str, Any]:
+        """Finish loading a golden read by _read_golden_head (in place)"""
+        path = golden.pop("_path", None)
+        if path is not None:
+            golden.update(orjson.loads(path.read_bytes()))
+            self._intern_screen(golden)
+        return golden
+
+    def add_golden(self, name: str, golden: Dict[str, Any]):
+        """Add or replace a golden, keeping the digest-prefix index in step"""
+        old = self.golden_screens.get(name)
+        if old is not None and old.get("digest"):
+            prefix = old["digest"][:16]
+            if self.golden_by_prefix.get(prefix) is old:
+                del self.golden_by_prefix[prefix]
+        self._intern_screen(golden)
+        if isinstance(golden.get("digest"), str):
+            golden["digest"] = sys.intern(golden["digest"])
+        self.golden_screens[name] = golden
+
+        # Transcript digests are 16-char prefixes
+        if golden.get("digest"):
+            self.golden_by_prefix.setdefault(golden["digest"][:16], golden)
+        if "ascii" in golden:
+            self.screen_digests[golden["ascii"]] = short_digest(golden["ascii"])
+
+    def screen_digest(self, ascii_text: str) -> str:
+        """short_digest of a screen, computed once per distinct screen"""
+        # Consecutive steps usually show the same screen object
+        if ascii_text is self._last_ascii:
+            return self._last_digest
+        digest = self.screen_digests.get(ascii_text)
+        if digest is None:
+            digest = self.screen_digests[ascii_text] = short_digest(ascii_text)
+        self._last_ascii, self._last_digest = ascii_text, digest
+        return digest
+
     def connect(self, host: str = "127.0.0.1:3270") -> Dict[str, Any]:
         """Mock connect"""
         if self.golden_screens.get("initial"):
-            self.current_screen = self.golden_screens["initial"]["ascii"]
+            self.current_screen = self._hydrate(self.golden_screens["initial"])["ascii"]
         else:
             self.current_screen = "MOCK: Connected to " + host
         return {"status": "connected", "mock": True}
@@ -62,16 +240,19 @@ class MockBridge:
             # Try to get screen from digest
             digest = step.get("digest_after")
             if digest:
-                for name, golden in self.golden_screens.items():
-                    if golden.get("digest", "").startswith(digest):
-                        self.current_screen = golden["ascii"]
-                        break
-
-        return {
-            "ascii": self.current_screen or "MOCK SCREEN",
-            "cursor": [1, 1],
-            "mock": True
-        }
+                golden = self.golden_by_prefix.get(digest)
+                if golden:
+                    self.current_screen = self._hydrate(golden)["ascii"]
+
+        # Reuse the result dict until the screen changes (callers only read it)
+        ascii_text = self.current_screen or "MOCK SCREEN"
+        if self._screen_result is None or self._screen_result["ascii"] is not ascii_text:
+            self._screen_result = {
+                "ascii": ascii_text,
+                "cursor": [1, 1],
+                "mock": True
+            }
+        return self._screen_result
 
     def execute_action(self, tool: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """Execute mock action"""
@@ -80,18 +261,19 @@ class MockBridge:
         # Update screen based on action
         if tool == "press" and params.get("key") == "Enter":
             if "LOGON" in self.current_screen and self.golden_screens.get("ready"):
-                self.current_screen = self.golden_screens["ready"]["ascii"]
+                self.current_screen = self._hydrate(self.golden_screens["ready"])["ascii"]
             elif self.golden_screens.get("next"):
-                self.current_screen = self.golden_screens["next"]["ascii"]
+                self.current_screen = self._hydrate(self.golden_screens["next"])["ascii"]
 
-        return {"status": "success", "mock": True}
+        return _ACTION_RESULT
 
 
 class ReplayHarness:
     """Main replay harness for regression testing"""
 
-    def __init__(self, mode: str = "replay"):
+    def __init__(self, mode: str = "replay", quiet: bool = False):
         self.mode = mode  # "replay", "record", "compare"
+        self.quiet = quiet  # skip per-step output, keep the summary
         self.results = []
         self.differences = []
 
@@ -99,18 +281,31 @@ class ReplayHarness:
         """Replay a transcript and compare with goldens"""
         print(f"\n=== Replaying Transcript: {transcript_file.name} ===")
 
-        # Create mock bridge
-        bridge = MockBridge(transcript_file, golden_dir)
+        # Index the transcript once and share it with the mock bridge
+        with TranscriptIndex(transcript_file) as steps:
+            bridge = MockBridge(golden_dir=golden_dir, transcript=steps)
+            print(f"Loaded {len(steps)} steps from transcript")
+            return self._replay_steps(bridge, steps)
+
+    def _replay_steps(self, bridge: MockBridge, steps) -> bool:
+        """Replay indexed transcript steps against the mock bridge"""
 
-        # Replay each step
-        with open(transcript_file) as f:
-            steps = [json.loads(line) for line in f if line.strip()]
+        # Per-step output is buffered and written every _LOG_FLUSH_STEPS steps
+        out: List[str] = []
+        log = (lambda line: None) if self.quiet else out.append
+
+        def flush():
+            if out:
+                sys.stdout.write("".join(out))
+                sys.stdout.flush()
+                out.clear()
 
         success_count = 0
         error_count = 0
+        total_steps = len(steps)
 
         for i, step in enumerate(steps):
-            print(f"\nStep {i+1}/{len(steps)}: {step['tool']}")
+            log(f"\nStep {i+1}/{total_steps}: {step['tool']}\n")
 
             # Get expected outcome
             expected_outcome = step.get("outcome", "success")
@@ -130,10 +325,10 @@ class ReplayHarness:
             # Compare outcome
             actual_outcome = "success" if result else "error"
             if actual_outcome == expected_outcome:
-                print(f"  ✓ Outcome matches: {expected_outcome}")
+                log(f"  ✓ Outcome matches: {expected_outcome}\n")
                 success_count += 1
             else:
-                print(f"  ✗ Outcome mismatch: expected {expected_outcome}, got {actual_outcome}")
+                log(f"  ✗ Outcome mismatch: expected {expected_outcome}, got {actual_outcome}\n")
                 error_count += 1
                 self.differences.append({
                     "step": i+1,
@@ -144,11 +339,11 @@ class ReplayHarness:
 
             # Check screen digest if available
             if expected_digest and result.get("ascii"):
-                actual_digest = hashlib.sha256(result["ascii"].encode()).hexdigest()[:16]
+                actual_digest = bridge.screen_digest(result["ascii"])
                 if actual_digest == expected_digest:
-                    print(f"  ✓ Screen digest matches")
+                    log(f"  ✓ Screen digest matches\n")
                 else:
-                    print(f"  ✗ Screen digest mismatch")
+                    log(f"  ✗ Screen digest mismatch\n")
                     self.differences.append({
                         "step": i+1,
                         "type": "digest",
@@ -156,6 +351,11 @@ class ReplayHarness:
                         "actual": actual_digest
                     })
 
+            if (i + 1) % _LOG_FLUSH_STEPS == 0:
+                flush()
+
+        flush()
+
         # Summary
         total = success_count + error_count
         success_rate = (success_count / total * 100) if total > 0 else 0
@@ -178,7 +378,7 @@ class ReplayHarness:
         lines1 = screen1.split('\n')
         lines2 = screen2.split('\n')
 
-        diff = difflib.unified_diff(
+        diff = screen_diff(
             lines1, lines2,
             fromfile=f"{name}_expected",
             tofile=f"{name}_actual",
@@ -211,8 +411,7 @@ class ReplayHarness:
                 print(f"  ⚠ No golden for: {name}")
                 continue
 
-            with open(golden_file) as f:
-                golden_data = json.load(f)
+            golden_data = orjson.loads(golden_file.read_bytes())
 
             golden_screen = golden_data.get("ascii", "")
 
@@ -227,20 +426,21 @@ class ReplayHarness:
         golden_dir.mkdir(parents=True, exist_ok=True)
 
         golden_file = golden_dir / f"{name}.json"
+        rows, cols = screen_dims(screen)
 
+        # digest first so MockBridge can index goldens from the file head
         golden_data = {
+            "digest": hashlib.sha256(screen.encode()).hexdigest(),
             "name": name,
             "timestamp": datetime.now().isoformat(),
-            "digest": hashlib.sha256(screen.encode()).hexdigest(),
             "ascii": screen,
             "metadata": {
-                "rows": len(screen.split('\n')),
-                "cols": max(len(line) for line in screen.split('\n')) if screen else 0
+                "rows": rows,
+                "cols": cols
             }
         }
 
-        with open(golden_file, 'w') as f:
-            json.dump(golden_data, f, indent=2)
+        golden_file.write_bytes(orjson.dumps(golden_data, option=orjson.OPT_INDENT_2))
 
         print(f"  ✓ Recorded golden: {golden_file}")
 
@@ -263,12 +463,11 @@ class ReplayHarness:
                 report["summary"]["types"].get(diff_type, 0) + 1
 
         if output_file:
-            with open(output_file, 'w') as f:
-                json.dump(report, f, indent=2)
+            Path(output_file).write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
             print(f"\nReport saved to: {output_file}")
         else:
             print(f"\n=== Regression Report ===")
-            print(json.dumps(report, indent=2))
+            print(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode())
 
         return report
 
@@ -277,7 +476,7 @@ def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(description="Replay harness for regression testing")
 
-    parser.add_argument("--mode", choices=["replay", "record", "validate"],
+    parser.add_argument("--mode", choices=["replay", "record", "validate", "pack"],
                         default="replay", help="Operating mode")
     parser.add_argument("--transcript", type=Path,
                         help="Transcript file to replay (JSONL)")
@@ -287,12 +486,14 @@ def main():
                         help="Test screen file to validate")
     parser.add_argument("--record-name", type=str,
                         help="Name for recording golden screen")
+    parser.add_argument("--quiet", action="store_true",
+                        help="Only print the replay summary")
     parser.add_argument("--report", type=Path,
                         help="Output file for regression report")
 
     args = parser.parse_args()
 
-    harness = ReplayHarness(mode=args.mode)
+    harness = ReplayHarness(mode=args.mode, quiet=args.quiet)
 
     if args.mode == "replay":
         if not args.transcript:
@@ -322,12 +523,17 @@ def main():
             sys.exit(1)
 
         # Load test screens
-        with open(args.test_screen) as f:
-            test_data = json.load(f) if args.test_screen.suffix == '.json' else {"test": f.read()}
+        if args.test_screen.suffix == '.json':
+            test_data = orjson.loads(args.test_screen.read_bytes())
+        else:
+            test_data = {"test": args.test_screen.read_text()}
 
         success = harness.validate_golden(args.golden_dir, test_data)
         sys.exit(0 if success else 1)
 
+    elif args.mode == "pack":
+        pack_goldens(args.golden_dir)
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
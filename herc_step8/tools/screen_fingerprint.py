@@ -3,10 +3,30 @@
 
 import re
 import hashlib
-import json
+import orjson
 import difflib
+import functools
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Callable, Dict, Any, Optional, List, Tuple
+
+# Optional: near-linear diffs for large (multi-screen) inputs
+try:
+    from diff_match_patch import diff_match_patch
+    _dmp = diff_match_patch()
+except ImportError:
+    _dmp = None
+
+# Optional: one-pass multi-literal search for classify_screen
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Combined text size above which diff_match_patch is used instead of difflib
+_DMP_MIN_CHARS = 50_000
+
+# Whitespace (other than the newline itself) at the end of each line
+_TRAILING_WS_RE = re.compile(r'[^\S\n]+$', re.M)
 
 def normalize_screen(ascii_text: str) -> str:
     """
@@ -15,21 +35,30 @@ def normalize_screen(ascii_text: str) -> str:
     - Normalize multiple spaces to single space
     - Strip leading/trailing blank lines
     """
-    lines = ascii_text.split('\n')
+    return _TRAILING_WS_RE.sub('', ascii_text).strip('\n')
 
-    # Trim trailing whitespace from each line
-    lines = [line.rstrip() for line in lines]
+# ^\s*LITERAL\s*$ (no MULTILINE): the whole screen, stripped, is LITERAL
+_WHOLE_TEXT_RE = re.compile(r'\^\\s\*(.+)\\s\*\$')
 
-    # Remove leading blank lines
-    while lines and not lines[0]:
-        lines.pop(0)
+@functools.lru_cache(maxsize=None)
+def _rule_matcher(pattern: str) -> Callable[[str], Any]:
+    r"""
+    Build the matcher for a match-rule regex once per pattern
 
-    # Remove trailing blank lines
-    while lines and not lines[-1]:
-        lines.pop()
+    Patterns that are plain text become a substring test and
+    ^\s*TEXT\s*$ becomes a strip-and-compare; anything else is compiled.
+    """
+    if re.escape(pattern) == pattern:
+        return lambda text: pattern in text
+
+    m = _WHOLE_TEXT_RE.fullmatch(pattern)
+    if m and re.escape(m.group(1)) == m.group(1):
+        literal = m.group(1)
+        return lambda text: text.strip() == literal
 
-    return '\n'.join(lines)
+    return re.compile(pattern).search
 
+@functools.lru_cache(maxsize=1024)
 def compute_digest(ascii_text: str) -> str:
     """Compute SHA256 digest of normalized screen text"""
     normalized = normalize_screen(ascii_text)
@@ -69,7 +98,7 @@ def match_screen(snapshot: Dict[str, Any], screen_id: Dict[str, Any]) -> Tuple[b
             return True, f"ascii_contains: {screen_id['ascii_contains']}"
 
     if 'ascii_regex' in screen_id:
-        if re.search(screen_id['ascii_regex'], ascii_text):
+        if _rule_matcher(screen_id['ascii_regex'])(ascii_text):
             return True, f"ascii_regex: {screen_id['ascii_regex']}"
 
     # Match rules in 'match' dict
@@ -84,7 +113,7 @@ def match_screen(snapshot: Dict[str, Any], screen_id: Dict[str, Any]) -> Tuple[b
                         return True, f"ascii_contains: {rule['ascii_contains']}"
 
                 if 'ascii_regex' in rule:
-                    if re.search(rule['ascii_regex'], ascii_text):
+                    if _rule_matcher(rule['ascii_regex'])(ascii_text):
                         return True, f"ascii_regex: {rule['ascii_regex']}"
 
         # Check 'all' rules (AND logic)
@@ -101,7 +130,7 @@ def match_screen(snapshot: Dict[str, Any], screen_id: Dict[str, Any]) -> Tuple[b
                         matched_rules.append(f"ascii_contains: {rule['ascii_contains']}")
 
                 if 'ascii_regex' in rule:
-                    if re.search(rule['ascii_regex'], ascii_text):
+                    if _rule_matcher(rule['ascii_regex'])(ascii_text):
                         matched = True
                         matched_rules.append(f"ascii_regex: {rule['ascii_regex']}")
 
@@ -120,7 +149,7 @@ def match_screen(snapshot: Dict[str, Any], screen_id: Dict[str, Any]) -> Tuple[b
                     return True, f"ascii_contains: {rule['ascii_contains']}"
 
             if 'ascii_regex' in rule:
-                if re.search(rule['ascii_regex'], ascii_text):
+                if _rule_matcher(rule['ascii_regex'])(ascii_text):
                     return True, f"ascii_regex: {rule['ascii_regex']}"
 
     return False, None
@@ -132,24 +161,30 @@ def save_golden(name: str, snapshot: Dict[str, Any], goldens_dir: Path = None) -
 
     goldens_dir.mkdir(parents=True, exist_ok=True)
 
+    ascii_text = snapshot.get('ascii', '')
+
     # Save ASCII text
     text_file = goldens_dir / f"{name}.txt"
     with open(text_file, 'w') as f:
-        f.write(snapshot.get('ascii', ''))
+        f.write(ascii_text)
+
+    # Bridge snapshots already carry a digest; only hash when one is missing
+    digest = snapshot.get('digest')
+    if digest is None and 'digest' not in snapshot:
+        digest = compute_digest(ascii_text)
 
     # Save metadata (digest, dimensions, fields)
     meta_file = goldens_dir / f"{name}.json"
     metadata = {
         'name': name,
-        'digest': snapshot.get('digest', compute_digest(snapshot.get('ascii', ''))),
+        'digest': digest,
         'rows': snapshot.get('rows', 24),
         'cols': snapshot.get('cols', 80),
         'field_count': len(snapshot.get('fields', [])),
         'cursor': snapshot.get('cursor', [0, 0])
     }
 
-    with open(meta_file, 'w') as f:
-        json.dump(metadata, f, indent=2)
+    meta_file.write_bytes(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
 
     return meta_file
 
@@ -167,8 +202,7 @@ def load_golden(name: str, goldens_dir: Path = None) -> Dict[str, Any]:
     with open(text_file, 'r') as f:
         ascii_text = f.read()
 
-    with open(meta_file, 'r') as f:
-        metadata = json.load(f)
+    metadata = orjson.loads(meta_file.read_bytes())
 
     return {
         'ascii': ascii_text,
@@ -179,6 +213,106 @@ def load_golden(name: str, goldens_dir: Path = None) -> Dict[str, Any]:
         'fields': []  # Fields not stored in golden
     }
 
+def _unified_range(start: int, stop: int) -> str:
+    """Format a hunk range the way difflib.unified_diff does"""
+    length = stop - start
+    if length == 1:
+        return str(start + 1)
+    return f"{start + 1 if length else start},{length}"
+
+def _grouped_opcodes(opcodes: List[Tuple[str, int, int, int, int]], n: int):
+    """difflib's hunk grouping applied to precomputed opcodes"""
+    matcher = difflib.SequenceMatcher(None, (), ())
+    matcher.opcodes = opcodes  # get_opcodes returns a set opcodes list as-is
+    return matcher.get_grouped_opcodes(n)
+
+def _aligned_opcodes(a: List[str], b: List[str]) -> Optional[List[Tuple[str, int, int, int, int]]]:
+    """Row-by-row opcodes for same-height screens with few changed rows"""
+    if len(a) != len(b):
+        return None
+    changed = sum(1 for x, y in zip(a, b) if x != y)
+    if changed >= max(len(a) // 4, 1):
+        return None
+
+    opcodes = []
+    i = 0
+    while i < len(a):
+        j = i
+        same = a[i] == b[i]
+        while j < len(a) and (a[j] == b[j]) == same:
+            j += 1
+        opcodes.append(('equal' if same else 'replace', i, j, i, j))
+        i = j
+    return opcodes
+
+def _dmp_opcodes(a: List[str], b: List[str]) -> List[Tuple[str, int, int, int, int]]:
+    """Line-level opcodes from diff_match_patch (near-linear on large inputs)"""
+    # One newline per line, so an empty list stays empty rather than one blank line
+    chars1, chars2, line_array = _dmp.diff_linesToChars(''.join(line + '\n' for line in a),
+                                                        ''.join(line + '\n' for line in b))
+    opcodes = []
+    i = j = 0
+    deleted = inserted = 0
+
+    def flush():
+        if deleted or inserted:
+            tag = 'replace' if deleted and inserted else ('delete' if deleted else 'insert')
+            opcodes.append((tag, i - deleted, i, j - inserted, j))
+
+    # Each char stands for one line
+    for op, text in _dmp.diff_main(chars1, chars2, False):
+        k = len(text)
+        if op == _dmp.DIFF_EQUAL:
+            flush()
+            deleted = inserted = 0
+            opcodes.append(('equal', i, i + k, j, j + k))
+            i += k
+            j += k
+        elif op == _dmp.DIFF_DELETE:
+            deleted += k
+            i += k
+        else:
+            inserted += k
+            j += k
+    flush()
+    return opcodes
+
+def screen_diff(a: List[str], b: List[str], fromfile: str = '', tofile: str = '',
+                lineterm: str = '', n: int = 3):
+    """
+    Unified diff of two screens
+
+    Same-height screens with only a few changed rows are diffed row-by-row,
+    large inputs go through diff_match_patch when it is installed, and
+    everything else through difflib.
+    """
+    opcodes = _aligned_opcodes(a, b)
+    if opcodes is None and _dmp is not None and \
+            sum(map(len, a)) + sum(map(len, b)) > _DMP_MIN_CHARS:
+        opcodes = _dmp_opcodes(a, b)
+    if opcodes is None:
+        yield from difflib.unified_diff(a, b, fromfile, tofile, lineterm=lineterm, n=n)
+        return
+
+    started = False
+    for group in _grouped_opcodes(opcodes, n):
+        if not started:
+            started = True
+            yield f"--- {fromfile}{lineterm}"
+            yield f"+++ {tofile}{lineterm}"
+
+        first, last = group[0], group[-1]
+        yield f"@@ -{_unified_range(first[1], last[2])} +{_unified_range(first[3], last[4])} @@{lineterm}"
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                for line in a[i1:i2]:
+                    yield ' ' + line
+                continue
+            for line in a[i1:i2]:
+                yield '-' + line
+            for line in b[j1:j2]:
+                yield '+' + line
+
 def assert_golden(name: str, snapshot: Dict[str, Any], goldens_dir: Path = None) -> Tuple[bool, str]:
     """
     Assert current snapshot matches golden
@@ -201,7 +335,7 @@ def assert_golden(name: str, snapshot: Dict[str, Any], goldens_dir: Path = None)
     golden_lines = golden.get('ascii', '').splitlines()
     current_lines = snapshot.get('ascii', '').splitlines()
 
-    diff = difflib.unified_diff(
+    diff = screen_diff(
         golden_lines,
         current_lines,
         fromfile=f"golden/{name}",
@@ -218,18 +352,22 @@ def find_input_fields(snapshot: Dict[str, Any]) -> List[Dict[str, Any]]:
     fields = snapshot.get('fields', [])
     return [f for f in fields if not f.get('protected', True)]
 
+@functools.lru_cache(maxsize=32)
+def _screen_lines(ascii_text: str) -> Tuple[str, ...]:
+    """Screen rows, split once per screen for repeated label lookups"""
+    return tuple(ascii_text.split('\n'))
+
 def get_field_at_label(snapshot: Dict[str, Any], label: str, offset: int = 1) -> Optional[Dict[str, Any]]:
     """
     Find field at offset from label text
 
     Returns field info with row/col position
     """
-    ascii_text = snapshot.get('ascii', '')
-    lines = ascii_text.split('\n')
+    lines = _screen_lines(snapshot.get('ascii', ''))
 
     for row_idx, line in enumerate(lines):
-        if label in line:
-            label_pos = line.index(label)
+        label_pos = line.find(label)
+        if label_pos != -1:
             field_col = label_pos + len(label) + offset
             field_row = row_idx + 1  # 1-based
 
@@ -309,6 +447,54 @@ SCREEN_IDS = {
     }
 }
 
+def _rule_lists(screen_id: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Every rule dict of a screen ID (top level, any, match.any, match.all)"""
+    match_rules = screen_id.get('match', {})
+    return [screen_id, *screen_id.get('any', []),
+            *match_rules.get('any', []), *match_rules.get('all', [])]
+
+def _build_screen_index():
+    """Map each ascii_contains literal in SCREEN_IDS to the IDs that use it"""
+    literals: Dict[str, set] = {}
+    regex_ids = set()
+    for sid, screen_id in SCREEN_IDS.items():
+        for rule in _rule_lists(screen_id):
+            if 'ascii_contains' in rule:
+                literals.setdefault(rule['ascii_contains'], set()).add(sid)
+            if 'ascii_regex' in rule:
+                regex_ids.add(sid)
+
+    automaton = None
+    if ahocorasick is not None and literals:
+        automaton = ahocorasick.Automaton()
+        for literal in literals:
+            automaton.add_word(literal, literal)
+        automaton.make_automaton()
+    return literals, frozenset(regex_ids), automaton
+
+_SCREEN_LITERALS, _REGEX_SCREEN_IDS, _SCREEN_AUTOMATON = _build_screen_index()
+
+def classify_screen(snapshot: Dict[str, Any]) -> List[str]:
+    """
+    Names of all SCREEN_IDS that match a snapshot
+
+    Every distinct ascii_contains literal is looked for once (one
+    Aho-Corasick pass when pyahocorasick is installed); only IDs with a
+    literal hit or a regex rule are then checked with match_screen.
+    """
+    ascii_text = snapshot.get('ascii', '')
+    if _SCREEN_AUTOMATON is not None:
+        hits = {literal for _, literal in _SCREEN_AUTOMATON.iter(ascii_text)}
+    else:
+        hits = {literal for literal in _SCREEN_LITERALS if literal in ascii_text}
+
+    candidates = set(_REGEX_SCREEN_IDS)
+    for literal in hits:
+        candidates |= _SCREEN_LITERALS[literal]
+
+    return [sid for sid, screen_id in SCREEN_IDS.items()
+            if sid in candidates and match_screen(snapshot, screen_id)[0]]
+
 if __name__ == "__main__":
     # Test code
     test_snapshot = {
@@ -1,19 +1,53 @@
 #!/usr/bin/env python3
 """Watchdog monitoring system for TN3270 Bridge and Agent"""
 
+import atexit
+import concurrent.futures
+import http.client
+import os
 import time
-import requests
 import subprocess
 import json
 import signal
-import sys
+import socket
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+import threading
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import argparse
 
 
+def find_processes(name: str, first_only: bool = False) -> Optional[List[Tuple[str, str]]]:
+    """(pid, comm) of processes named exactly `name`; None without /proc
+
+    Exact, so a launcher such as start_hercules.sh (comm "start_hercules.")
+    is not mistaken for the emulator itself.
+    """
+    try:
+        entries = os.scandir("/proc")
+    except OSError:
+        return None
+
+    matches = []
+    with entries:
+        for entry in entries:
+            if not entry.name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry.name}/comm") as f:
+                    comm = f.read().rstrip("\n")
+            except OSError:
+                continue  # process exited mid-scan
+            if comm == name:
+                matches.append((entry.name, comm))
+                if first_only:
+                    break
+    return matches
+
+
 class ServiceWatchdog:
     """Monitor and manage services"""
 
@@ -26,14 +60,30 @@ class ServiceWatchdog:
         self.log_dir.mkdir(parents=True, exist_ok=True)
         self._setup_logging()
 
-        # Service URLs (LOCALHOST ONLY)
-        self.bridge_health_url = "http://127.0.0.1:8080/healthz"
-        self.bridge_reset_url = "http://127.0.0.1:8080/reset_session"
+        # Service endpoints (LOCALHOST ONLY)
+        self.bridge_host = "127.0.0.1"
+        self.bridge_port = 8080
+        self.bridge_health_path = "/healthz"
+        self.bridge_reset_path = "/reset_session"
+
+        # One keep-alive connection to the bridge, reused by every check
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._conn_lock = threading.Lock()
+        atexit.register(self._close_conn)
 
         # State tracking
         self.failures = {"bridge": 0, "hercules": 0}
-        self.last_restart = {"bridge": None, "hercules": None}
+        self.last_restart = {"bridge": None, "hercules": None}  # monotonic seconds
+        self._last_restart_wall = {"bridge": None, "hercules": None}  # for get_status
         self.running = True
+        self._wake = threading.Event()  # set to cut the tick sleep short
+
+        self.bridge_health_data: Dict[str, Any] = {}  # last /healthz payload
+        self._procs: Dict[str, subprocess.Popen] = {}  # services we started
+
+        # Bridge and Hercules checks run side by side each tick
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        self._lock = threading.Lock()  # guards failures
 
         # Signal handling
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -72,41 +122,83 @@ class ServiceWatchdog:
 
     def _setup_logging(self):
         """Setup logging"""
-        log_file = self.log_dir / f"watchdog_{datetime.now().strftime('%Y%m%d')}.log"
+        # Rolls over at midnight in-process; keeps two weeks of history
+        file_handler = TimedRotatingFileHandler(
+            self.log_dir / "watchdog.log",
+            when="midnight",
+            interval=1,
+            backupCount=14,
+            encoding="utf-8"
+        )
 
+        # Records are formatted by the caller and written by a listener thread,
+        # so a slow log disk never stalls a health check
+        log_queue = queue.Queue(-1)
+        self._listener = QueueListener(
+            log_queue,
+            file_handler,
+            logging.StreamHandler(),
+            respect_handler_level=True
+        )
         logging.basicConfig(
             level=logging.INFO,
             format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler()
-            ]
+            handlers=[QueueHandler(log_queue)]
         )
+        self._listener.start()
+        atexit.register(self._listener.stop)
         self.logger = logging.getLogger("watchdog")
 
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals"""
         self.logger.info(f"Received signal {signum}, shutting down...")
         self.running = False
-        sys.exit(0)
+        self._wake.set()
+
+    def _fail(self, service: str):
+        """Count a failed check (checks may run on pool threads)"""
+        with self._lock:
+            self.failures[service] += 1
+
+    def _ok(self, service: str):
+        """Clear the failure count after a passing check"""
+        with self._lock:
+            self.failures[service] = 0
+
+    def _result(self, fut: concurrent.futures.Future, service: str, wait: float) -> bool:
+        """Outcome of a pooled check; a check that overruns counts as a failure"""
+        try:
+            return fut.result(timeout=wait)
+        except concurrent.futures.TimeoutError:
+            self.logger.error(f"{service} check still running after {wait:.0f}s")
+            self._fail(service)
+            return False
 
     def check_bridge_health(self) -> bool:
         """Check TN3270 Bridge health"""
         if not self.config["services"]["bridge"]["enabled"]:
             return True
-
+        return self._check_bridge()
+
+    def _check_bridge(self) -> bool:
+        """Query the bridge /healthz endpoint"""
+        self.bridge_health_data = {}  # never leave a stale payload for test_mode
+        # Probe only without a kept-alive connection (first check, or after a
+        # failure dropped it): nothing listening skips the HTTP timeout
+        if self._conn is None and not self._bridge_port_open():
+            self.logger.error("Bridge health check failed: port %s closed", self.bridge_port)
+            self._fail("bridge")
+            return False
         try:
-            response = requests.get(
-                self.bridge_health_url,
-                timeout=self.config["timeout"]
-            )
+            status, body = self._bridge_request("GET", self.bridge_health_path)
 
-            if response.status_code == 200:
-                data = response.json()
+            if status == 200:
+                data = json.loads(body)
+                self.bridge_health_data = data
                 # Check if connected and recent activity
                 if data.get("connected"):
                     self.logger.debug("Bridge healthy and connected")
-                    self.failures["bridge"] = 0
+                    self._ok("bridge")
                     return True
                 else:
                     self.logger.warning("Bridge not connected to mainframe")
@@ -114,87 +206,133 @@ class ServiceWatchdog:
                     self._reconnect_bridge()
                     return True
 
-            elif response.status_code == 503:
+            elif status == 503:
                 # Service degraded
                 self.logger.warning("Bridge service degraded")
-                self.failures["bridge"] += 1
+                self._fail("bridge")
                 return False
 
-        except requests.RequestException as e:
-            self.logger.error(f"Bridge health check failed: {e}")
-            self.failures["bridge"] += 1
+        except (http.client.HTTPException, OSError) as e:
+            self.logger.error("Bridge health check failed: %s", e)
+            self._fail("bridge")
             return False
 
         return False
 
+    def _bridge_request(self, method: str, path: str) -> Tuple[int, bytes]:
+        """(status, body) over the persistent bridge connection"""
+        with self._conn_lock:
+            for retry in (True, False):
+                fresh = self._conn is None
+                if fresh:
+                    self._conn = http.client.HTTPConnection(
+                        self.bridge_host, self.bridge_port, timeout=self.config["timeout"]
+                    )
+                try:
+                    self._conn.request(method, path)
+                    response = self._conn.getresponse()
+                    return response.status, response.read()
+                except (http.client.HTTPException, OSError) as e:
+                    self._conn.close()
+                    self._conn = None
+                    # A reused socket the bridge closed while idle gets one retry
+                    if fresh or not retry or isinstance(e, socket.timeout):
+                        raise
+
+    def _close_conn(self):
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _bridge_port_open(self) -> bool:
+        """Cheap TCP connect to the bridge port before opening a connection"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(0.2)
+        try:
+            sock.connect((self.bridge_host, self.bridge_port))
+            return True
+        except OSError:
+            return False
+        finally:
+            sock.close()
+
     def _reconnect_bridge(self):
         """Try to reconnect bridge to mainframe"""
         try:
-            response = requests.post(
-                self.bridge_reset_url,
-                timeout=self.config["timeout"]
-            )
-            if response.status_code == 200:
+            status, _ = self._bridge_request("POST", self.bridge_reset_path)
+            if status == 200:
                 self.logger.info("Bridge session reset successfully")
             else:
-                self.logger.warning(f"Bridge reset returned: {response.status_code}")
+                self.logger.warning("Bridge reset returned: %s", status)
         except Exception as e:
-            self.logger.error(f"Failed to reset bridge: {e}")
+            self.logger.error("Failed to reset bridge: %s", e)
 
     def check_hercules(self) -> bool:
         """Check if Hercules is running"""
         if not self.config["services"]["hercules"]["enabled"]:
             return True
+        return self._check_hercules()
 
+    def _check_hercules(self) -> bool:
+        """Look for a running hercules process"""
         try:
-            # Use pgrep to check if hercules is running
-            result = subprocess.run(
-                ["pgrep", "hercules"],
-                capture_output=True,
-                timeout=self.config["timeout"]
-            )
-
-            if result.returncode == 0:
+            # Scan /proc (no fork per check); pgrep where there is no /proc
+            matches = find_processes("hercules", first_only=True)
+            if matches is None:
+                result = subprocess.run(
+                    ["pgrep", "-x", "hercules"],
+                    capture_output=True,
+                    timeout=self.config["timeout"]
+                )
+                running = result.returncode == 0
+            else:
+                running = bool(matches)
+
+            if running:
                 self.logger.debug("Hercules is running")
-                self.failures["hercules"] = 0
+                self._ok("hercules")
                 return True
             else:
                 self.logger.warning("Hercules not found")
-                self.failures["hercules"] += 1
+                self._fail("hercules")
                 return False
 
         except Exception as e:
-            self.logger.error(f"Hercules check failed: {e}")
-            self.failures["hercules"] += 1
+            self.logger.error("Hercules check failed: %s", e)
+            self._fail("hercules")
             return False
 
     def restart_service(self, service: str) -> bool:
         """Restart a service"""
         # Check if we've restarted too recently
-        if self.last_restart[service]:
-            time_since = datetime.now() - self.last_restart[service]
-            if time_since.total_seconds() < self.config["restart_delay"]:
+        if self.last_restart[service] is not None:
+            time_since = time.monotonic() - self.last_restart[service]
+            if time_since < self.config["restart_delay"]:
                 self.logger.info(
-                    f"Skipping {service} restart (too recent: {time_since.total_seconds():.0f}s ago)"
+                    f"Skipping {service} restart (too recent: {time_since:.0f}s ago)"
                 )
                 return False
 
         self.logger.warning(f"Restarting {service}...")
 
         try:
-            # Stop service
-            stop_cmd = self.config["services"][service]["stop_cmd"]
-            subprocess.run(stop_cmd, shell=True, timeout=10)
-            time.sleep(2)
-
-            # Start service
+            # Stop service: signal the process group we started, else stop_cmd
+            proc = self._procs.pop(service, None)
+            if proc is None or not self._stop_group(proc.pid):
+                stop_cmd = self.config["services"][service]["stop_cmd"]
+                subprocess.run(stop_cmd, shell=True, timeout=10)
+                time.sleep(2)
+
+            # Start service in its own session so it can be stopped as a group
             start_cmd = self.config["services"][service]["start_cmd"]
-            subprocess.Popen(start_cmd, shell=True)
-            time.sleep(5)
+            self._procs[service] = subprocess.Popen(start_cmd, shell=True, start_new_session=True)
+            self._wait_healthy(service)
 
             # Mark restart time
-            self.last_restart[service] = datetime.now()
-            self.failures[service] = 0
+            self.last_restart[service] = time.monotonic()
+            self._last_restart_wall[service] = datetime.now()
+            self._ok(service)
 
             self.logger.info(f"{service} restarted successfully")
             return True
@@ -203,16 +341,62 @@ class ServiceWatchdog:
             self.logger.error(f"Failed to restart {service}: {e}")
             return False
 
+    def _stop_group(self, pgid: int, timeout: float = 5.0) -> bool:
+        """SIGTERM a process group and wait for it to exit (SIGKILL on timeout)
+
+        Returns False if the group no longer exists.
+        """
+        try:
+            os.killpg(pgid, signal.SIGTERM)
+        except ProcessLookupError:
+            return False
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                os.waitpid(pgid, os.WNOHANG)  # reap the leader if it is ours
+            except ChildProcessError:
+                pass
+            try:
+                os.killpg(pgid, 0)
+            except ProcessLookupError:
+                return True
+            time.sleep(0.05)
+
+        self.logger.warning(f"Process group {pgid} ignored SIGTERM, killing")
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        return True
+
+    def _wait_healthy(self, service: str, timeout: float = 10.0):
+        """Poll a freshly started service until its check passes"""
+        check = self._check_bridge if service == "bridge" else self._check_hercules
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if check():
+                return
+            time.sleep(0.2)
+        self.logger.warning(f"{service} not healthy {timeout:.0f}s after start")
+
     def monitor_loop(self):
         """Main monitoring loop"""
         self.logger.info("Watchdog started - monitoring services")
-        self.logger.info(f"Config: {json.dumps(self.config, indent=2)}")
+        # --interval may have changed the config after __init__, so render here
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("Config: %s", json.dumps(self.config, indent=2, default=str))
 
         while self.running:
             try:
-                # Check services
-                bridge_ok = self.check_bridge_health()
-                hercules_ok = self.check_hercules()
+                # Check services concurrently; a tick costs the slower check.
+                # Worst case for the bridge: GET plus its retry, then a reset
+                # request plus its retry, each bounded by the HTTP timeout.
+                wait = 4 * self.config["timeout"] + 1
+                fut_b = self._pool.submit(self.check_bridge_health)
+                fut_h = self._pool.submit(self.check_hercules)
+                bridge_ok = self._result(fut_b, "bridge", wait)
+                hercules_ok = self._result(fut_h, "hercules", wait)
 
                 # Restart if needed
                 if not bridge_ok and self.failures["bridge"] >= self.config["max_failures"]:
@@ -221,19 +405,24 @@ class ServiceWatchdog:
                 if not hercules_ok and self.failures["hercules"] >= self.config["max_failures"]:
                     self.restart_service("hercules")
                     # Also restart bridge after hercules
-                    time.sleep(10)
+                    if self._wake.wait(10):
+                        break
                     self.restart_service("bridge")
 
-                # Sleep before next check
-                time.sleep(self.config["check_interval"])
+                # Sleep before next check (returns early on shutdown)
+                if self._wake.wait(self.config["check_interval"]):
+                    break
 
             except KeyboardInterrupt:
                 self.logger.info("Monitoring interrupted by user")
                 break
             except Exception as e:
                 self.logger.error(f"Monitor loop error: {e}")
-                time.sleep(self.config["check_interval"])
+                if self._wake.wait(self.config["check_interval"]):
+                    break
 
+        self._pool.shutdown(wait=False)
+        self._close_conn()
         self.logger.info("Watchdog stopped")
 
     def get_status(self) -> Dict[str, Any]:
@@ -243,7 +432,7 @@ class ServiceWatchdog:
             "failures": self.failures,
             "last_restart": {
                 k: v.isoformat() if v else None
-                for k, v in self.last_restart.items()
+                for k, v in self._last_restart_wall.items()
             },
             "config": self.config
         }
@@ -258,14 +447,12 @@ class ServiceWatchdog:
         print("\n1. TN3270 Bridge:")
         if self.check_bridge_health():
             print("   ✓ Bridge is healthy")
-            try:
-                response = requests.get(self.bridge_health_url, timeout=2)
-                data = response.json()
+            # Details from the payload the health check just fetched
+            data = self.bridge_health_data
+            if data:
                 print(f"   - Status: {data.get('status')}")
                 print(f"   - Connected: {data.get('connected')}")
                 print(f"   - Uptime: {data.get('uptime_seconds', 0):.0f}s")
-            except:
-                pass
         else:
             print("   ✗ Bridge is not healthy")
 
@@ -273,13 +460,18 @@ class ServiceWatchdog:
         print("\n2. Hercules:")
         if self.check_hercules():
             print("   ✓ Hercules is running")
-            result = subprocess.run(
-                ["pgrep", "-l", "hercules"],
-                capture_output=True,
-                text=True
-            )
-            if result.stdout:
-                print(f"   - Process: {result.stdout.strip()}")
+            matches = find_processes("hercules")
+            if matches is None:
+                result = subprocess.run(
+                    ["pgrep", "-l", "-x", "hercules"],
+                    capture_output=True,
+                    text=True
+                )
+                listing = result.stdout.strip()
+            else:
+                listing = "\n".join(f"{pid} {comm}" for pid, comm in matches)
+            if listing:
+                print(f"   - Process: {listing}")
         else:
             print("   ✗ Hercules is not running")
 
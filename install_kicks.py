@@ -9,14 +9,63 @@ import sys
 import os
 import time
 from pathlib import Path
+from typing import Sequence
 
 # Add project to path
 sys.path.insert(0, str(Path(__file__).parent))
 
+import herc_console
 from tn3270.client import TN3270Client
 from tn3270.parser import ScreenParser
 from tn3270.commands import CommandBuilder
 
+# Member contents are constant; built once at import
+_JCL_RECVKICK = (
+    "//HERC01RK JOB (ACCT),'RECV KICKS',CLASS=A,MSGCLASS=X,",
+    "//         NOTIFY=&SYSUID,MSGLEVEL=(1,1)",
+    "//RECV     EXEC PGM=RECV370",
+    "//STEPLIB  DD DSN=SYSC.LINKLIB,DISP=SHR",
+    "//RECVLOG  DD SYSOUT=*",
+    "//XMITIN   DD UNIT=RDR,DCB=(RECFM=FB,LRECL=80,BLKSIZE=3120)",
+    "//SYSPRINT DD SYSOUT=*",
+    "//SYSUT1   DD UNIT=SYSDA,SPACE=(CYL,(10,10))",
+    "//SYSUT2   DD DSN=HERC01.KICKS.XMIT,DISP=(NEW,CATLG,DELETE),",
+    "//         UNIT=3390,VOL=SER=TSO001,SPACE=(CYL,(30,10))",
+)
+
+_CLIST_KICKS = (
+    "PROC 0 TCP()",
+    "CONTROL NOFLUSH NOLIST NOMSG",
+    "FREE F(STEPLIB DFHRPL SYSIN)",
+    "ALLOC F(STEPLIB) DA('HERC01.KICKS.V1R5M0.LOADLIB') SHR REUSE",
+    "ALLOC F(DFHRPL) DA('HERC01.KICKS.V1R5M0.LOADLIB') SHR REUSE",
+    "ALLOC F(SYSIN) DUMMY REUSE",
+    "CALL 'HERC01.KICKS.V1R5M0.LOADLIB(KIKSIP00)' +",
+    "     'KCP() PCP() FCP() DCP() SCP() TSP() BMS() TCP(1$)'",
+    "FREE F(STEPLIB DFHRPL SYSIN)",
+)
+
+async def _send_line(client: TN3270Client, line: str, expect: str = None, timeout: float = 2.0) -> bool:
+    """Type a line, press Enter and wait for the host instead of sleeping"""
+    await client.send_string(line)
+    await client.send_enter()
+    if expect:
+        return await client.wait_for_text(expect, timeout=timeout)
+    return await client.wait_for_keyboard_unlock(timeout=timeout)
+
+async def _write_member(client: TN3270Client, member: str, lines: Sequence[str]):
+    """Store lines in a PDS member: one IND$FILE upload, else type them into EDIT"""
+    if await client.ind_file_put(member, lines):
+        return
+
+    await _send_line(client, f"EDIT '{member}' NEW", expect="INPUT", timeout=5)
+
+    for line in lines:
+        await _send_line(client, line)
+
+    await client.send_pf(3)  # Exit edit
+    await client.wait_for_keyboard_unlock(timeout=2)
+
 async def install_kicks():
     """Main installation routine"""
 
@@ -36,105 +85,69 @@ async def install_kicks():
             print("ERROR: Failed to connect to mainframe")
             return False
 
-        await asyncio.sleep(2)
-
-        # Logon to TSO
+        # Logon to TSO (waits for the READY prompt)
         print("[2/8] Logging on to TSO...")
         if not await client.logon("HERC01", "CUL8TR"):
             print("ERROR: Failed to logon")
             return False
 
-        await asyncio.sleep(3)
-
-        # Wait for READY prompt
-        if not await client.wait_for_text("READY", timeout=10):
-            print("ERROR: TSO not ready")
-            return False
-
         print("    TSO logon successful")
 
         # Step 1: Initialize card reader with XMIT file
         print("[3/8] Preparing XMIT file transfer...")
 
-        # First, we need to tell Hercules to load the XMIT file to the card reader
-        # This would typically be done via Hercules console command:
-        # devinit 00c /home/jim/herc/mvs38j/mvs-tk5/rdr/kicks-tso-v1r5m0.xmi ebcdic
-
-        print("    NOTE: Execute this command in Hercules console:")
-        print("    devinit 00c /home/jim/herc/mvs38j/mvs-tk5/rdr/kicks-tso-v1r5m0.xmi ebcdic")
-        print("    Press Enter when ready...")
-        input()
+        # Load the XMIT file into the card reader through the Hercules console
+        xmit_file = "/home/jim/herc/mvs38j/mvs-tk5/rdr/kicks-tso-v1r5m0.xmi"
+        if await herc_console.devinit(xmit_file):
+            print("    Card reader 00C loaded")
+        elif sys.stdin.isatty():
+            print("    NOTE: Execute this command in Hercules console:")
+            print(f"    devinit 00c {xmit_file} ebcdic")
+            print("    Press Enter when ready...")
+            input()
+        else:
+            print("ERROR: Hercules console unreachable; run devinit 00c manually")
+            return False
 
         # Step 2: Submit RECV370 JCL
         print("[4/8] Submitting RECV370 job...")
 
         # Submit the JCL to receive the XMIT file
-        await client.send_string("SUBMIT 'HERC01.JCL(RECVKICK)'")
-        await client.send_enter()
-        await asyncio.sleep(3)
+        await _send_line(client, "SUBMIT 'HERC01.JCL(RECVKICK)'", expect="SUBMITTED", timeout=3)
 
         # Check for job submission message
-        screen = client.get_screen()
-        if "JOB" in screen and "SUBMITTED" in screen:
+        screen = await client.get_screen()
+        idx = screen.find("SUBMITTED")
+        cols = client.screen_size[1]
+        start = idx - idx % cols
+        if idx >= 0 and screen.rfind("JOB", start, idx) >= 0:
             print("    RECV370 job submitted successfully")
         else:
             # If no member exists, we need to create it first
             print("    Creating RECVKICK JCL member...")
 
             # Allocate JCL dataset if needed
-            await client.send_string("ALLOC DA('HERC01.JCL') NEW SPACE(5,5) TRACKS " +
-                                   "DSORG(PO) RECFM(FB) LRECL(80) BLKSIZE(3120) DIR(10)")
-            await client.send_enter()
-            await asyncio.sleep(2)
-
-            # Edit the member
-            await client.send_string("EDIT 'HERC01.JCL(RECVKICK)' NEW")
-            await client.send_enter()
-            await asyncio.sleep(2)
+            await _send_line(client, "ALLOC DA('HERC01.JCL') NEW SPACE(5,5) TRACKS " +
+                             "DSORG(PO) RECFM(FB) LRECL(80) BLKSIZE(3120) DIR(10)")
 
             # Enter the JCL
-            jcl_lines = [
-                "//HERC01RK JOB (ACCT),'RECV KICKS',CLASS=A,MSGCLASS=X,",
-                "//         NOTIFY=&SYSUID,MSGLEVEL=(1,1)",
-                "//RECV     EXEC PGM=RECV370",
-                "//STEPLIB  DD DSN=SYSC.LINKLIB,DISP=SHR",
-                "//RECVLOG  DD SYSOUT=*",
-                "//XMITIN   DD UNIT=RDR,DCB=(RECFM=FB,LRECL=80,BLKSIZE=3120)",
-                "//SYSPRINT DD SYSOUT=*",
-                "//SYSUT1   DD UNIT=SYSDA,SPACE=(CYL,(10,10))",
-                "//SYSUT2   DD DSN=HERC01.KICKS.XMIT,DISP=(NEW,CATLG,DELETE),",
-                "//         UNIT=3390,VOL=SER=TSO001,SPACE=(CYL,(30,10))",
-            ]
-
-            for line in jcl_lines:
-                await client.send_string(line)
-                await client.send_enter()
-                await asyncio.sleep(0.5)
-
-            # Save and submit
-            await client.send_pf(3)  # Exit edit
-            await asyncio.sleep(2)
-
-            await client.send_string("SUBMIT 'HERC01.JCL(RECVKICK)'")
-            await client.send_enter()
-            await asyncio.sleep(3)
+            await _write_member(client, "HERC01.JCL(RECVKICK)", _JCL_RECVKICK)
+
+            # Submit the new member
+            await _send_line(client, "SUBMIT 'HERC01.JCL(RECVKICK)'", expect="SUBMITTED", timeout=3)
 
         # Step 3: Use TSO RECEIVE to unpack the XMIT
         print("[5/8] Unpacking KICKS installation files...")
 
         await client.send_clear()
-        await asyncio.sleep(1)
 
-        await client.send_string("RECEIVE INDATASET('HERC01.KICKS.XMIT')")
-        await client.send_enter()
-        await asyncio.sleep(3)
+        # RECEIVE answers with INMR messages (and may prompt for restore parameters)
+        await _send_line(client, "RECEIVE INDATASET('HERC01.KICKS.XMIT')", expect="INMR", timeout=5)
 
         # Answer prompts for RECEIVE
-        screen = client.get_screen()
+        screen = await client.get_screen()
         if "INMR901A" in screen or "dataset name" in screen.lower():
-            await client.send_string("DA('HERC01.KICKS.INSTALL')")
-            await client.send_enter()
-            await asyncio.sleep(3)
+            await _send_line(client, "DA('HERC01.KICKS.INSTALL')", expect="READY", timeout=10)
 
         print("    XMIT file unpacked")
 
@@ -152,12 +165,9 @@ async def install_kicks():
 
         for dsname, params in datasets:
             await client.send_clear()
-            await asyncio.sleep(1)
 
             cmd = f"ALLOC DA('{dsname}') NEW {params}"
-            await client.send_string(cmd)
-            await client.send_enter()
-            await asyncio.sleep(2)
+            await _send_line(client, cmd, expect="READY", timeout=5)
 
             print(f"    Allocated {dsname}")
 
@@ -165,31 +175,8 @@ async def install_kicks():
         print("[7/8] Creating KICKS startup CLIST...")
 
         await client.send_clear()
-        await asyncio.sleep(1)
-
-        await client.send_string("EDIT 'HERC01.KICKS.V1R5M0.CLIST(KICKS)' NEW")
-        await client.send_enter()
-        await asyncio.sleep(2)
-
-        clist_lines = [
-            "PROC 0 TCP()",
-            "CONTROL NOFLUSH NOLIST NOMSG",
-            "FREE F(STEPLIB DFHRPL SYSIN)",
-            "ALLOC F(STEPLIB) DA('HERC01.KICKS.V1R5M0.LOADLIB') SHR REUSE",
-            "ALLOC F(DFHRPL) DA('HERC01.KICKS.V1R5M0.LOADLIB') SHR REUSE",
-            "ALLOC F(SYSIN) DUMMY REUSE",
-            "CALL 'HERC01.KICKS.V1R5M0.LOADLIB(KIKSIP00)' +",
-            "     'KCP() PCP() FCP() DCP() SCP() TSP() BMS() TCP(1$)'",
-            "FREE F(STEPLIB DFHRPL SYSIN)",
-        ]
-
-        for line in clist_lines:
-            await client.send_string(line)
-            await client.send_enter()
-            await asyncio.sleep(0.5)
 
-        await client.send_pf(3)  # Exit edit
-        await asyncio.sleep(2)
+        await _write_member(client, "HERC01.KICKS.V1R5M0.CLIST(KICKS)", _CLIST_KICKS)
 
         print("    KICKS startup CLIST created")
 
@@ -197,14 +184,12 @@ async def install_kicks():
         print("[8/8] Testing KICKS startup...")
 
         await client.send_clear()
-        await asyncio.sleep(1)
 
-        await client.send_string("EXEC 'HERC01.KICKS.V1R5M0.CLIST(KICKS)'")
-        await client.send_enter()
-        await asyncio.sleep(5)
+        # The command line itself contains KICKS, so wait for the keyboard, not the text
+        await _send_line(client, "EXEC 'HERC01.KICKS.V1R5M0.CLIST(KICKS)'", timeout=5)
 
         # Check for KICKS startup
-        screen = client.get_screen()
+        screen = await client.get_screen()
         if "KICKS" in screen.upper():
             print("    KICKS started successfully!")
             print()
@@ -216,11 +201,9 @@ async def install_kicks():
             print("-" * 60)
 
             # Try to start demo transaction
-            await client.send_string("DEMO")
-            await client.send_enter()
-            await asyncio.sleep(2)
+            await _send_line(client, "DEMO", timeout=2)
 
-            demo_screen = client.get_screen()
+            demo_screen = await client.get_screen()
             print("\nDemo transaction screen:")
             print("-" * 60)
             print(demo_screen)
@@ -228,9 +211,7 @@ async def install_kicks():
 
             # Shutdown KICKS
             await client.send_clear()
-            await client.send_string("KSSF")
-            await client.send_enter()
-            await asyncio.sleep(3)
+            await _send_line(client, "KSSF", expect="READY", timeout=5)
         else:
             print("    WARNING: Could not verify KICKS startup")
             print("    Screen content:")
@@ -238,7 +219,6 @@ async def install_kicks():
 
         # Logoff
         await client.logoff()
-        await client.disconnect()
 
         print("\nInstallation Summary:")
         print("- KICKS Version: 1.5.0")
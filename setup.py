@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """Setup script for Mainframe Copilot - AI-driven mainframe automation system"""
 
+import fcntl
 import os
 import sys
 import subprocess
@@ -33,6 +34,7 @@ REQUIRES = [
     "requests>=2.31.0",
     "pyyaml>=6.0",
     "psutil>=5.9.0",
+    "orjson>=3.9.0",
 ]
 
 # Package directories
@@ -101,12 +103,20 @@ class PostInstallCommand:
             herc_home / "stop.sh": HERC_STEP8_DIR / "stop.sh",
         }
 
-        for link_path, target_path in links.items():
-            if target_path.exists():
-                if link_path.exists() or link_path.is_symlink():
-                    link_path.unlink()
-                link_path.symlink_to(target_path)
-                print(f"✓ Linked {link_path.name} → {target_path}")
+        # Serialize concurrent installs; closing the fd releases the lock
+        lock_fd = os.open(str(herc_home / ".install.lock"), os.O_CREAT | os.O_RDWR)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            for link_path, target_path in links.items():
+                if target_path.exists():
+                    # Build the link under a temp name and rename it over the old
+                    # one, so the path never goes missing (e.g. for a running demo.sh)
+                    tmp_path = link_path.parent / f".{link_path.name}.tmp.{os.getpid()}"
+                    os.symlink(target_path, tmp_path)
+                    os.replace(tmp_path, link_path)
+                    print(f"✓ Linked {link_path.name} → {target_path}")
+        finally:
+            os.close(lock_fd)
 
     def check_mvs_files(self):
         """Check if MVS files are installed"""
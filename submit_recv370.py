@@ -3,75 +3,69 @@
 Submit RECV370 job to process KICKS XMIT file
 """
 
-import time
-from py3270 import Emulator
-
-# Connect to MVS
-em = Emulator(visible=False)
-em.connect('localhost:3270')
-time.sleep(3)
-
-# Wait for initial screen
-time.sleep(1)
-
-# Send clear key to unlock keyboard
-em.exec_command(b'Clear')
-time.sleep(1)
-
-# Logon to TSO with HERC02
-em.send_string("LOGON HERC02")
-em.send_enter()
-time.sleep(2)
-
-# Enter password
-em.send_string("CUL8TR")
-em.send_enter()
-time.sleep(3)
-
-# Wait for READY
-for _ in range(10):
-    screen = em.string_get(1, 1, 1920)  # Get 24x80 screen
-    if "READY" in screen:
-        break
-    time.sleep(1)
-
-print("Logged on to TSO, submitting RECV370 job...")
-
-# Submit the JCL from the dataset
-em.send_string("SUBMIT 'HERC02.JCL(RECVKICK)'")
-em.send_enter()
-time.sleep(3)
-
-# Check for submission
-screen = em.string_get(1, 1, 1920)
-if "JOB" in screen and "SUBMITTED" in screen:
-    print("RECV370 job submitted successfully")
-    # Extract job number if possible
-    lines = screen.split('\n')
-    for line in lines:
-        if "JOB" in line and "SUBMITTED" in line:
-            print(f"Job info: {line.strip()}")
-            break
-else:
-    print("Could not verify job submission")
-    print(f"Screen content:\n{screen}")
-
-# Wait a bit for job to complete
-print("Waiting for job to complete...")
-time.sleep(10)
-
-# Check job status with STATUS command
-em.send_string("STATUS")
-em.send_enter()
-time.sleep(2)
-
-status_screen = em.string_get(1, 1, 1920)
-print(f"Status output:\n{status_screen}")
-
-# Logoff
-em.send_string("LOGOFF")
-em.send_enter()
-time.sleep(2)
-
-em.disconnect()
-print("Disconnected from TSO")
\ No newline at end of file
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tn3270.client import TN3270Client
+
+
+async def main() -> bool:
+    client = TN3270Client("localhost", 3270)
+
+    # Connect to MVS
+    if not await client.connect():
+        print("Could not connect to MVS")
+        return False
+
+    try:
+        # Logon to TSO with HERC02 (clears the screen, waits for READY)
+        if not await client.logon("HERC02", "CUL8TR"):
+            print("TSO logon failed")
+            return False
+
+        print("Logged on to TSO, submitting RECV370 job...")
+
+        # Submit the JCL from the dataset
+        await client.send_string("SUBMIT 'HERC02.JCL(RECVKICK)'")
+        await client.send_enter()
+
+        # Check for submission
+        if await client.wait_for_text("SUBMITTED", timeout=3):
+            print("RECV370 job submitted successfully")
+            # Extract job number if possible: the row holding SUBMITTED
+            screen = await client.get_screen()
+            idx = screen.find("SUBMITTED")
+            cols = client.screen_size[1]
+            start = idx - idx % cols
+            if idx >= 0 and screen.rfind("JOB", start, idx) >= 0:
+                print(f"Job info: {screen[start:start + cols].strip()}")
+        else:
+            print("Could not verify job submission")
+            print(f"Screen content:\n{await client.get_screen()}")
+
+        # Wait for the job-ended notify rather than a fixed 10s
+        print("Waiting for job to complete...")
+        await client.wait_for_text("ENDED", timeout=10)
+
+        # Check job status with STATUS command
+        await client.send_string("STATUS")
+        await client.send_enter()
+        await client.wait_for_keyboard_unlock(timeout=2)
+
+        print(f"Status output:\n{await client.get_screen()}")
+
+        # Logoff
+        await client.logoff()
+        return True
+
+    finally:
+        await client.disconnect()
+        print("Disconnected from TSO")
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
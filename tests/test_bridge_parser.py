@@ -0,0 +1,51 @@
+"""Tests for the bridge's ReadBuffer(Ascii) field parser"""
+
+import sys
+from pathlib import Path
+
+# The bridge is run from herc_step8/bridge, not installed as a package
+sys.path.insert(0, str(Path(__file__).parent.parent / "herc_step8" / "bridge"))
+
+from tn3270_bridge.parser import find_fields_at_position, parse_readbuffer_ascii
+
+# 3x10 screen: two fields on row 1 (the second wraps onto row 2), one more
+# starting mid-row 2 and two on row 3, the last running to end of screen.
+# Like the Ascii screen text, each row keeps the space after "data:" as column 1.
+READBUFFER = [
+    "data: SF(c0=20)Name:SF(c0=00)abcd",
+    "data: fghijSF(c0=20)Pass",
+    "data: SF(c0=08)xxSF(c0=28)yyyyyyy",
+    "U F U C(localhost) I 2 3 10 0 0 0x0 -",
+    "ok",
+]
+
+
+def _layout(fields):
+    return [(f["row"], f["col"], f["len"], f["linear_start"], f["linear_end"]) for f in fields]
+
+
+def test_field_positions_with_several_markers_per_row():
+    fields = parse_readbuffer_ascii(READBUFFER, rows=3, cols=10)
+
+    # SF markers take no cells, so each start is its offset minus earlier markers
+    assert _layout(fields) == [
+        (1, 2, 5, 1, 6),
+        (1, 7, 10, 6, 16),
+        (2, 7, 5, 16, 21),
+        (3, 2, 2, 21, 23),
+        (3, 4, 7, 23, 30),
+    ]
+    assert [f["protected"] for f in fields] == [True, False, True, False, True]
+
+
+def test_field_wrapping_across_rows_is_found_on_both_rows():
+    fields = parse_readbuffer_ascii(READBUFFER, rows=3, cols=10)
+
+    assert find_fields_at_position(fields, 1, 10, cols=10) is fields[1]
+    assert find_fields_at_position(fields, 2, 3, cols=10) is fields[1]
+    assert find_fields_at_position(fields, 2, 7, cols=10) is fields[2]
+    assert find_fields_at_position(fields, 3, 10, cols=10) is fields[4]
+
+
+def test_non_data_lines_are_ignored():
+    assert parse_readbuffer_ascii(["ok", "error", ""], rows=3, cols=10) == []
@@ -4,13 +4,33 @@ Handles connection, screen management, and basic 3270 protocol operations
 """
 
 import asyncio
+import concurrent.futures
 import logging
-from typing import Optional, Tuple, List, Dict, Any
+import math
+import os
+import re
+import tempfile
+from functools import lru_cache
+from typing import Awaitable, Callable, Optional, Tuple, List, Dict, Any
 from py3270 import Emulator
 import time
 
 logger = logging.getLogger(__name__)
 
+# Back-to-back reads within this many seconds share one string_get
+_SCREEN_TTL = 0.05
+
+
+def _quote(text: str) -> str:
+    """Quote text as an s3270 action argument"""
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+@lru_cache(maxsize=64)
+def _prompt_pattern(names: Tuple[str, ...]) -> "re.Pattern":
+    """One alternation regex for a set of prompts, compiled once per set"""
+    return re.compile("|".join(map(re.escape, names)))
+
 
 class TN3270Client:
     """Wrapper for py3270 emulator with async support and enhanced functionality"""
@@ -29,8 +49,23 @@ class TN3270Client:
         self.timeout = timeout
         self.emulator: Optional[Emulator] = None
         self.connected = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None  # sync context manager only
+
+        # py3270 calls block on s3270 IPC; one worker keeps them in order
+        # (created on first use, shut down by disconnect)
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
         self.screen_size = (24, 80)  # Standard 3270 Model 2
 
+        # Last screen read; dropped on every keystroke, reused for _SCREEN_TTL
+        self._screen_cache: Optional[str] = None
+        self._screen_cache_time = 0.0
+
+        # (start, end) of each row in the flat screen string
+        rows, cols = self.screen_size
+        self._row_slices = tuple((i * cols, (i + 1) * cols) for i in range(rows))
+        self._lines_source: Optional[str] = None
+        self._lines: List[str] = []
+
     async def connect(self) -> bool:
         """
         Establish connection to mainframe
@@ -40,19 +75,23 @@ class TN3270Client:
         """
         try:
             # Initialize emulator
-            self.emulator = Emulator(visible=False, timeout=self.timeout)
+            self.emulator = await self._call(lambda: Emulator(visible=False, timeout=self.timeout))
 
             # Connect to host
             connection_string = f"{self.host}:{self.port}"
             logger.info(f"Connecting to {connection_string}")
 
-            self.emulator.connect(connection_string)
+            await self._call(self.emulator.connect, connection_string)
 
-            # Wait for connection to establish
-            await asyncio.sleep(1)
+            # Wait for connection to establish (20ms backoff up to 200ms)
+            deadline = time.monotonic() + self.timeout
+            interval = 0.02
+            while not await self._call(self.emulator.is_connected) and time.monotonic() < deadline:
+                await asyncio.sleep(interval)
+                interval = min(0.2, interval * 2)
 
             # Check connection status
-            if self.emulator.is_connected():
+            if await self._call(self.emulator.is_connected):
                 self.connected = True
                 logger.info(f"Successfully connected to {connection_string}")
                 return True
@@ -65,52 +104,141 @@ class TN3270Client:
             return False
 
     async def disconnect(self):
-        """Disconnect from mainframe"""
+        """Disconnect from mainframe and stop the worker thread"""
         if self.emulator and self.connected:
             try:
-                self.emulator.terminate()
+                await self._call(self.emulator.terminate)
+                self._screen_cache = None
                 self.connected = False
                 logger.info("Disconnected from mainframe")
             except Exception as e:
                 logger.error(f"Disconnect error: {e}")
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def is_connected(self) -> bool:
+        """
+        Ask s3270 whether the host connection is still up
+
+        Returns:
+            bool: True if connected
+        """
+        if not self.emulator or not self.connected:
+            return False
+        try:
+            return await self._call(self.emulator.is_connected)
+        except Exception as e:
+            logger.debug(f"Connection check failed: {e}")
+            return False
+
+    async def _call(self, fn: Callable, *args):
+        """Run a blocking py3270 call on this session's worker thread"""
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
 
-    def get_screen(self) -> str:
+    async def get_screen(self, refresh: bool = False) -> str:
         """
         Get current screen content as string
 
+        Args:
+            refresh: Skip the cache and read from the emulator
+
         Returns:
             str: Screen content
         """
         if not self.emulator:
             return ""
 
+        now = time.monotonic()
+        if (not refresh and self._screen_cache is not None
+                and now - self._screen_cache_time < _SCREEN_TTL):
+            return self._screen_cache
+
         try:
-            return self.emulator.string_get(1, 1, *self.screen_size)
+            rows, cols = self.screen_size
+            screen = await self._call(self.emulator.string_get, 1, 1, rows * cols)
         except Exception as e:
             logger.error(f"Error getting screen: {e}")
             return ""
 
-    def get_screen_array(self) -> List[str]:
+        self._screen_cache = screen
+        self._screen_cache_time = now
+        return screen
+
+    async def get_screen_array(self) -> List[str]:
         """
         Get screen content as array of lines
 
         Returns:
             List[str]: Screen lines
         """
-        screen = self.get_screen()
+        screen = await self.get_screen()
         if not screen:
             return []
 
-        lines = []
-        rows, cols = self.screen_size
+        # Same screen string as last time: reuse its split
+        if screen is not self._lines_source:
+            self._lines = [screen[start:end].rstrip() for start, end in self._row_slices]
+            self._lines_source = screen
+        return list(self._lines)
+
+    async def ind_file_put(self, dataset: str, lines: List[str], lrecl: int = 80) -> bool:
+        """
+        Upload text lines to a host dataset or member with IND$FILE
+
+        Must be called from the TSO READY prompt; the host needs IND$FILE.
+
+        Args:
+            dataset: Fully qualified dataset name, e.g. HERC01.JCL(MEMBER)
+            lines: Records to store (at most lrecl characters each)
+            lrecl: Record length of the target dataset
+
+        Returns:
+            bool: True if the transfer completed
+        """
+        if not self.emulator:
+            raise RuntimeError("Not connected to mainframe")
 
-        for i in range(rows):
-            start = i * cols
-            end = start + cols
-            line = screen[start:end] if start < len(screen) else ""
-            lines.append(line.rstrip())
+        fd, local_file = tempfile.mkstemp(suffix=".txt")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write("\n".join(lines) + "\n")
+
+            command = (
+                f"Transfer(Direction=send,HostFile=\"'{dataset}'\",LocalFile={local_file},"
+                f"Host=tso,Mode=ascii,Cr=remove,Recfm=fixed,Lrecl={lrecl})"
+            )
+            self._screen_cache = None
+            await self._call(self.emulator.exec_command, command.encode("ascii"))
+            logger.info(f"Uploaded {len(lines)} records to {dataset}")
+            return True
+        except Exception as e:
+            logger.warning(f"IND$FILE upload to {dataset} failed: {e}")
+            return False
+        finally:
+            os.unlink(local_file)
 
-        return lines
+    async def exec_script(self, actions: List[str]):
+        """
+        Run several s3270 actions as one command line
+
+        s3270 executes them in order (AID keys wait for the host) and
+        answers once, saving a round trip per action.
+
+        Args:
+            actions: Action calls, e.g. ["Clear()", 'String("TIME")', "Enter()"]
+        """
+        if not self.emulator:
+            raise RuntimeError("Not connected to mainframe")
+
+        self._screen_cache = None
+        try:
+            await self._call(self.emulator.exec_command, " ".join(actions).encode("ascii"))
+        except Exception as e:
+            logger.error(f"Error running {actions}: {e}")
+            raise
 
     async def send_string(self, text: str):
         """
@@ -123,8 +251,8 @@ class TN3270Client:
             raise RuntimeError("Not connected to mainframe")
 
         try:
-            self.emulator.send_string(text)
-            await asyncio.sleep(0.1)  # Small delay for processing
+            self._screen_cache = None
+            await self._call(self.emulator.send_string, text)  # local to the emulator; no host wait
         except Exception as e:
             logger.error(f"Error sending string: {e}")
             raise
@@ -135,8 +263,9 @@ class TN3270Client:
             raise RuntimeError("Not connected to mainframe")
 
         try:
-            self.emulator.send_enter()
-            await asyncio.sleep(0.5)  # Wait for screen update
+            self._screen_cache = None
+            await self._call(self.emulator.send_enter)
+            await self._wait_ready()
         except Exception as e:
             logger.error(f"Error sending enter: {e}")
             raise
@@ -155,8 +284,9 @@ class TN3270Client:
             raise ValueError(f"Invalid PF key number: {key_number}")
 
         try:
-            self.emulator.send_pf(key_number)
-            await asyncio.sleep(0.5)  # Wait for screen update
+            self._screen_cache = None
+            await self._call(self.emulator.send_pf, key_number)
+            await self._wait_ready()
         except Exception as e:
             logger.error(f"Error sending PF{key_number}: {e}")
             raise
@@ -167,8 +297,9 @@ class TN3270Client:
             raise RuntimeError("Not connected to mainframe")
 
         try:
-            self.emulator.send_clear()
-            await asyncio.sleep(0.5)
+            self._screen_cache = None
+            await self._call(self.emulator.send_clear)
+            await self._wait_ready()
         except Exception as e:
             logger.error(f"Error sending clear: {e}")
             raise
@@ -180,23 +311,44 @@ class TN3270Client:
         Returns:
             bool: True if field is ready
         """
-        if not self.emulator:
-            return False
+        # s3270 blocks until an input field accepts data; nothing to poll
+        return await self._wait_ready(10)
 
-        max_wait = 10  # seconds
-        start_time = time.time()
+    async def wait_for_keyboard_unlock(self, timeout: float = 2.0) -> bool:
+        """
+        Wait for the host to unlock the keyboard after an AID key
 
-        while time.time() - start_time < max_wait:
-            try:
-                status = self.emulator.status()
-                if status and status.field_protection == 'U':  # Unprotected field
-                    return True
-            except:
-                pass
+        Args:
+            timeout: Maximum wait time in seconds
 
-            await asyncio.sleep(0.2)
+        Returns:
+            bool: True if the keyboard unlocked in time
+        """
+        return await self._wait_ready(timeout)
+
+    async def _wait_ready(self, timeout: float = 5) -> bool:
+        """
+        Block until the keyboard accepts input (s3270 Wait(InputField))
 
-        return False
+        s3270 returns as soon as the host unlocks the keyboard, so there is
+        no client-side polling interval.
+
+        Args:
+            timeout: Maximum wait time in seconds (s3270 rounds up to whole seconds)
+
+        Returns:
+            bool: True if the keyboard is ready
+        """
+        if not self.emulator:
+            return False
+
+        secs = max(1, math.ceil(timeout))
+        try:
+            await self._call(self.emulator.exec_command, f"Wait({secs},InputField)".encode("ascii"))
+            return True
+        except Exception as e:
+            logger.debug(f"Keyboard not ready after {secs}s: {e}")
+            return False
 
     async def wait_for_text(self, text: str, timeout: int = 10) -> bool:
         """
@@ -209,17 +361,110 @@ class TN3270Client:
         Returns:
             bool: True if text found
         """
-        start_time = time.time()
+        async def seen(screen: str) -> bool:
+            return text in screen
 
-        while time.time() - start_time < timeout:
-            screen = self.get_screen()
-            if text in screen:
-                return True
-            await asyncio.sleep(0.5)
+        return await self._wait_until(seen, timeout)
+
+    async def match_any(self, names: List[str], screen: Optional[str] = None) -> Optional[Tuple[str, Tuple[int, int]]]:
+        """
+        Scan the screen once for several prompts
+
+        Args:
+            names: Prompts to look for, highest priority first
+            screen: Screen text to scan (default: read a fresh one)
+
+        Returns:
+            Optional[Tuple[str, Tuple[int, int]]]: (prompt, (row, column)) of the
+            highest-priority prompt on screen, or None
+        """
+        names = tuple(names)
+        if screen is None:
+            screen = await self.get_screen(refresh=True)
+        found: Dict[str, int] = {}
+        for m in _prompt_pattern(names).finditer(screen):
+            found.setdefault(m.group(), m.start())
+
+        cols = self.screen_size[1]
+        for name in names:
+            if name in found:
+                index = found[name]
+                return name, (index // cols + 1, index % cols + 1)
+        return None
+
+    async def wait_for_any(self, names: List[str], timeout: float = 10) -> Optional[Tuple[str, Tuple[int, int]]]:
+        """
+        Wait until one of several prompts appears on screen
+
+        Args:
+            names: Prompts to wait for, highest priority first
+            timeout: Maximum wait time in seconds
+
+        Returns:
+            Optional[Tuple[str, Tuple[int, int]]]: Matched prompt and its position, or None
+        """
+        hit = None
 
-        return False
+        async def seen(screen: str) -> bool:
+            nonlocal hit
+            hit = await self.match_any(names, screen)
+            return hit is not None
 
-    def find_text(self, text: str) -> Optional[Tuple[int, int]]:
+        await self._wait_until(seen, timeout)
+        return hit
+
+    async def wait_for_output(self, timeout: float = 1) -> bool:
+        """
+        Block until the host sends output (s3270 Wait(Output))
+
+        Args:
+            timeout: Maximum wait time in seconds (s3270 rounds up to whole seconds)
+
+        Returns:
+            bool: True if the host updated the screen in time
+        """
+        if not self.emulator:
+            return False
+
+        secs = max(1, math.ceil(timeout))
+        try:
+            await self._call(self.emulator.exec_command, f"Wait({secs},Output)".encode("ascii"))
+        except Exception as e:
+            logger.debug(f"No host output after {secs}s: {e}")
+            return False
+        finally:
+            self._screen_cache = None
+        return True
+
+    async def _wait_until(self, predicate: Callable[[str], Awaitable[bool]], timeout: float) -> bool:
+        """
+        Re-test predicate each time the host sends output
+
+        Args:
+            predicate: Async condition on the screen text
+            timeout: Maximum wait time in seconds
+
+        Returns:
+            bool: True if predicate became true before the deadline
+        """
+        deadline = time.monotonic() + timeout
+        missed = None
+        while True:
+            screen = await self.get_screen(refresh=True)
+            # Only re-test a screen that differs from the last miss
+            if screen != missed:
+                if await predicate(screen):
+                    return True
+                missed = screen
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.emulator:
+                return False
+            # 1s slices bound the cost of output that lands just before a Wait
+            if not await self.wait_for_output(min(remaining, 1)):
+                await asyncio.sleep(0.05)  # don't spin if s3270 rejects Wait
+
+    async def find_text(self, text: str) -> Optional[Tuple[int, int]]:
         """
         Find text position on screen
 
@@ -229,12 +474,8 @@ class TN3270Client:
         Returns:
             Optional[Tuple[int, int]]: (row, column) position or None
         """
-        screen = self.get_screen()
-        if not screen or text not in screen:
-            return None
-
-        index = screen.find(text)
-        if index == -1:
+        index = (await self.get_screen()).find(text)
+        if index < 0:
             return None
 
         cols = self.screen_size[1]
@@ -243,26 +484,38 @@ class TN3270Client:
 
         return (row, col)
 
-    def get_cursor_position(self) -> Tuple[int, int]:
+    async def get_cursor_position(self) -> Tuple[int, int]:
         """
         Get current cursor position
 
         Returns:
             Tuple[int, int]: (row, column) position
         """
-        if not self.emulator:
+        status = await self._status()
+        if status is None:
             return (1, 1)
 
         try:
-            status = self.emulator.status()
-            if status:
-                return (status.cursor_row, status.cursor_column)
-        except:
-            pass
+            # s3270 reports a 0-based cursor
+            return (int(status.cursor_row) + 1, int(status.cursor_col) + 1)
+        except (AttributeError, TypeError, ValueError):
+            return (1, 1)
 
-        return (1, 1)
+    async def _status(self):
+        """
+        Status line s3270 returned with the last command
+
+        py3270 refreshes it on every action, so reading it costs no IPC; it is
+        read on the worker thread so it cannot change mid-read.
+
+        Returns:
+            Optional[Status]: Parsed py3270 status, None if not connected
+        """
+        if not self.emulator:
+            return None
+        return await self._call(getattr, self.emulator, "status", None)
 
-    def move_cursor(self, row: int, col: int):
+    async def move_cursor(self, row: int, col: int):
         """
         Move cursor to specific position
 
@@ -274,7 +527,8 @@ class TN3270Client:
             raise RuntimeError("Not connected to mainframe")
 
         try:
-            self.emulator.move_to(row, col)
+            self._screen_cache = None
+            await self._call(self.emulator.move_to, row, col)
         except Exception as e:
             logger.error(f"Error moving cursor: {e}")
             raise
@@ -296,7 +550,6 @@ class TN3270Client:
 
             # Clear screen if needed
             await self.send_clear()
-            await asyncio.sleep(1)
 
             # Send LOGON command
             logon_cmd = f"LOGON {username}"
@@ -309,16 +562,15 @@ class TN3270Client:
                 await self.send_string(password)
                 await self.send_enter()
 
-                # Wait for READY prompt or logon messages
-                if await self.wait_for_text("READY", timeout=15):
-                    logger.info(f"Successfully logged on as {username}")
-                    return True
-                elif await self.wait_for_text("LOGON", timeout=5):
+                # Wait for READY prompt or logon messages (one scan per poll)
+                hit = await self.wait_for_any(["READY", "LOGON"], timeout=15)
+                if hit and hit[0] == "LOGON":
                     # Check for logon messages that might need acknowledgment
                     await self.send_enter()
-                    if await self.wait_for_text("READY", timeout=10):
-                        logger.info(f"Successfully logged on as {username}")
-                        return True
+                    hit = await self.wait_for_any(["READY"], timeout=10)
+                if hit:
+                    logger.info(f"Successfully logged on as {username}")
+                    return True
 
             logger.error("Logon failed - timeout or invalid credentials")
             return False
@@ -337,7 +589,6 @@ class TN3270Client:
         try:
             await self.send_string("LOGOFF")
             await self.send_enter()
-            await asyncio.sleep(2)
             logger.info("Logged off from TSO")
             return True
         except Exception as e:
@@ -355,32 +606,30 @@ class TN3270Client:
             str: Command output
         """
         try:
-            # Clear screen for clean output
-            await self.send_clear()
-            await asyncio.sleep(0.5)
-
-            # Send command
-            await self.send_string(command)
-            await self.send_enter()
-
-            # Wait for command to complete
-            await asyncio.sleep(2)
+            # Clear, type and Enter in one s3270 round trip
+            await self.exec_script(["Clear()", f"String({_quote(command)})", "Enter()"])
+            await self._wait_ready()
 
             # Get screen output
-            return self.get_screen()
+            return await self.get_screen()
 
         except Exception as e:
             logger.error(f"Error executing TSO command: {e}")
             raise
 
     def __enter__(self):
-        """Context manager entry"""
-        asyncio.run(self.connect())
+        """Context manager entry (one event loop for the whole session)"""
+        self._loop = asyncio.new_event_loop()
+        self._loop.run_until_complete(self.connect())
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit"""
-        asyncio.run(self.disconnect())
+        try:
+            self._loop.run_until_complete(self.disconnect())
+        finally:
+            self._loop.close()
+            self._loop = None
 
     async def __aenter__(self):
         """Async context manager entry"""
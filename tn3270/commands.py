@@ -4,11 +4,21 @@ Constructs properly formatted mainframe commands
 """
 
 import logging
+import re
 from typing import List, Optional, Dict, Any
 from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+# 1-8 character qualifiers: first alphabetic or national (@#$), rest alphanumeric or national
+_DS_RE = re.compile(r"[A-Z@#$][A-Z0-9@#$]{0,7}(?:\.[A-Z@#$][A-Z0-9@#$]{0,7})*", re.IGNORECASE)
+
+# Lowercase or special characters that force a quoted dataset name
+_NEEDS_QUOTE_RE = re.compile(r"[a-z()@#$]")
+
+# First non-blank character (where a continuation part resumes)
+_NON_BLANK_RE = re.compile(r"\S")
+
 
 class CommandType(Enum):
     """Types of mainframe commands"""
@@ -22,6 +32,14 @@ class CommandType(Enum):
 class CommandBuilder:
     """Build and format mainframe commands"""
 
+    # JOB card; filled by _jcl_header_text
+    _JCL_HEADER = (
+        "//{jobname} JOB ({account}),'MAINFRAME COPILOT',\n"
+        "//         CLASS={job_class},MSGCLASS={msgclass},\n"
+        "//         REGION={region},\n"
+        "//         NOTIFY=&SYSUID,MSGLEVEL=(1,1)"
+    )
+
     def __init__(self):
         """Initialize command builder"""
         self.max_command_length = 71  # TSO command line limit
@@ -111,14 +129,34 @@ class CommandBuilder:
         Returns:
             str: ALLOCATE command
         """
-        cmd = f"ALLOCATE DATASET('{dataset_name}')"
-        cmd += f" NEW SPACE({space_type},{space_primary},{space_secondary})"
-        cmd += f" DSORG({dsorg}) RECFM({recfm}) LRECL({lrecl})"
+        return (
+            f"ALLOCATE DATASET('{dataset_name}')"
+            f" NEW SPACE({space_type},{space_primary},{space_secondary})"
+            f" DSORG({dsorg}) RECFM({recfm}) LRECL({lrecl})"
+            + (f" BLKSIZE({blksize})" if blksize > 0 else "")
+        )
 
-        if blksize > 0:
-            cmd += f" BLKSIZE({blksize})"
+    def make_allocate(self, space_type: str = "TRACKS", dsorg: str = "PS",
+                      recfm: str = "FB", lrecl: int = 80, blksize: int = 0) -> str:
+        """
+        Pre-render ALLOCATE for a batch of datasets with the same attributes
 
-        return cmd
+        Args:
+            space_type: TRACKS, CYLINDERS, or BLOCKS
+            dsorg: Dataset organization (PS, PO, etc.)
+            recfm: Record format (F, FB, V, VB, etc.)
+            lrecl: Logical record length
+            blksize: Block size (0 for system determined)
+
+        Returns:
+            str: Template for str.format(dsname=..., primary=..., secondary=...)
+        """
+        return (
+            "ALLOCATE DATASET('{dsname}')"
+            f" NEW SPACE({space_type},{{primary}},{{secondary}})"
+            f" DSORG({dsorg}) RECFM({recfm}) LRECL({lrecl})"
+            + (f" BLKSIZE({blksize})" if blksize > 0 else "")
+        )
 
     def build_delete(self, dataset_name: str, purge: bool = False) -> str:
         """
@@ -233,7 +271,7 @@ class CommandBuilder:
 
     # JCL Generation
     def build_jcl_header(self, jobname: str, account: str = "ACCT",
-                        class: str = "A", msgclass: str = "X",
+                        job_class: str = "A", msgclass: str = "X",
                         region: str = "0M") -> List[str]:
         """
         Build JCL job header
@@ -241,21 +279,22 @@ class CommandBuilder:
         Args:
             jobname: Job name (max 8 chars)
             account: Account information
-            class: Job class
+            job_class: Job class (CLASS= parameter)
             msgclass: Message class
             region: Region size
 
         Returns:
             List[str]: JCL header lines
         """
-        jobname = jobname[:8].upper()
+        return self._jcl_header_text(jobname, account, job_class, msgclass, region).split("\n")
 
-        return [
-            f"//{jobname} JOB ({account}),'MAINFRAME COPILOT',",
-            f"//         CLASS={class},MSGCLASS={msgclass},",
-            f"//         REGION={region},",
-            "//         NOTIFY=&SYSUID,MSGLEVEL=(1,1)"
-        ]
+    def _jcl_header_text(self, jobname: str, account: str = "ACCT",
+                         job_class: str = "A", msgclass: str = "X",
+                         region: str = "0M") -> str:
+        """JCL job header as one newline-joined string"""
+        return self._JCL_HEADER.format(jobname=jobname[:8].upper(), account=account,
+                                       job_class=job_class, msgclass=msgclass,
+                                       region=region)
 
     def build_jcl_iefbr14(self, stepname: str = "STEP01") -> List[str]:
         """
@@ -335,13 +374,10 @@ class CommandBuilder:
         Returns:
             str: Complete JCL
         """
-        jcl_lines = self.build_jcl_header(jobname, account)
-
-        for step_lines in steps:
-            jcl_lines.append("//*")  # Step separator comment
-            jcl_lines.extend(step_lines)
-
-        return "\n".join(jcl_lines)
+        # "//*" separator comment before each step
+        return self._jcl_header_text(jobname, account) + "".join(
+            "\n//*\n" + "\n".join(step_lines) for step_lines in steps
+        )
 
     # SDSF Commands
     def build_sdsf_command(self, command: str) -> str:
@@ -371,7 +407,7 @@ class CommandBuilder:
         dataset = dataset.strip("'\"")
 
         # Add quotes if contains special characters or lowercase
-        if any(c.islower() or c in "()@#$" for c in dataset):
+        if _NEEDS_QUOTE_RE.search(dataset):
             return f"'{dataset}'"
 
         return dataset
@@ -389,33 +425,8 @@ class CommandBuilder:
         # Remove quotes for validation
         dataset = dataset.strip("'\"")
 
-        # Check overall length (max 44 characters)
-        if len(dataset) > 44:
-            return False
-
-        # Split into qualifiers
-        qualifiers = dataset.split('.')
-
-        # Must have at least one qualifier
-        if len(qualifiers) == 0:
-            return False
-
-        # Check each qualifier
-        for qualifier in qualifiers:
-            # Max 8 characters per qualifier
-            if len(qualifier) == 0 or len(qualifier) > 8:
-                return False
-
-            # First character must be alphabetic or national (@#$)
-            if not (qualifier[0].isalpha() or qualifier[0] in '@#$'):
-                return False
-
-            # Other characters must be alphanumeric or national
-            for char in qualifier[1:]:
-                if not (char.isalnum() or char in '@#$'):
-                    return False
-
-        return True
+        # Max 44 characters overall; qualifier rules in _DS_RE
+        return len(dataset) <= 44 and _DS_RE.fullmatch(dataset) is not None
 
     def truncate_command(self, command: str) -> str:
         """
@@ -445,21 +456,25 @@ class CommandBuilder:
         if len(command) <= self.max_command_length:
             return [command]
 
-        parts = []
-        remaining = command
-
-        while remaining:
-            if len(remaining) <= self.max_command_length:
-                parts.append(remaining)
-                break
-            else:
-                # Find last space before limit
-                split_pos = remaining[:self.max_command_length].rfind(' ')
-                if split_pos == -1:
-                    split_pos = self.max_command_length - 1
-
-                # Add continuation character
-                parts.append(remaining[:split_pos] + "-")
-                remaining = remaining[split_pos:].lstrip()
-
-        return parts
\ No newline at end of file
+        # Find (start, end) of each continued part by index, slicing only once
+        limit = self.max_command_length
+        end_of_command = len(command)
+        bounds = []
+        start = 0
+
+        while end_of_command - start > limit:
+            # Last space before limit
+            split_pos = command.rfind(' ', start, start + limit)
+            if split_pos == -1:
+                split_pos = start + limit - 1
+            bounds.append((start, split_pos))
+
+            # Next part starts at the first non-blank after the split
+            match = _NON_BLANK_RE.search(command, split_pos)
+            start = match.start() if match else end_of_command
+
+        # Add continuation character
+        parts = [command[a:b] + "-" for a, b in bounds]
+        if start < end_of_command:
+            parts.append(command[start:])
+        return parts
@@ -4,13 +4,81 @@ Parses and interprets 3270 screen content, fields, and attributes
 """
 
 import re
+import sys
 import logging
+from bisect import bisect_right
+from collections import OrderedDict
+from itertools import accumulate
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass
 from enum import Enum
 
+# Optional: SIMD multi-pattern matcher for identify_screen_type (Linux)
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
 logger = logging.getLogger(__name__)
 
+# Slotted dataclasses (no per-instance __dict__) where supported (3.10+)
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# Recently parsed screens kept per parser; shorter screens are cheaper to reparse
+_PARSE_CACHE_SIZE = 8
+_PARSE_CACHE_MIN_LEN = 200
+
+# Field, message and listing patterns, compiled once at import
+# Run over the whole screen, one match per row: every alternative is anchored at
+# the row start and tried in order (earlier field styles win), and [^\S\n]
+# keeps the whitespace runs from spilling into the next row
+_FIELD_RE = re.compile(
+    r'^(?:.*?===>[^\S\n]*(?P<cmd>.*)$'     # ISPF command fields
+    r'|.*?:[^\S\n]+_+'                     # Underscored input fields
+    r'|.*?:[^\S\n]*\[.*?\]'                # Bracketed fields
+    r'|.*?\.{3,}[^\S\n]*(?P<dot>.*)$)',     # Dotted fields
+    re.MULTILINE
+)
+
+# Literal prefixes of the message patterns below, to skip most lines cheaply
+_MESSAGE_PREFIXES = ('***', 'IKJ', 'IEE', 'IEF', '$HASP', 'IST')
+_MESSAGE_RE = re.compile(
+    r'^(?:\*{3}\s+'    # TSO messages (*** MESSAGE)
+    r'|IKJ\w+\s+'      # TSO messages
+    r'|IEE\w+\s+'      # System messages
+    r'|IEF\w+\s+'      # Job messages
+    r'|\$HASP\w+\s+'   # JES2 messages
+    r'|IST\w+\s+'      # VTAM messages
+    r')(.+)$'
+)
+
+_DATASET_HEADER_RE = re.compile(r'^(?=.*VOLUME)(?=.*DSORG).*$', re.IGNORECASE | re.MULTILINE)
+# Dataset row: name, then the rest of the line; repeated column headers are skipped
+_DATASET_RE = re.compile(
+    r'^(?!(?i:(?=.*VOLUME)(?=.*DSORG)))'
+    r'([A-Z0-9$#@]+(?:\.[A-Z0-9$#@]+)*)[^\S\n]+(.*)$',
+    re.MULTILINE
+)
+_DATASET_COLUMNS = ('name', 'volume', 'dsorg', 'recfm')
+_JOB_RE = re.compile(r'JOB\s+([A-Z0-9]+)\s+.*SUBMITTED')
+_JOB_NUMBER_RE = re.compile(r'JOB(\d+)')
+
+# Fixed keyword sets as single alternations: one scan instead of one per keyword
+_TITLE_KEYWORDS_RE = re.compile(r'ISPF|TSO|SDSF|MENU|PANEL|VTAM', re.IGNORECASE)
+_ERROR_KEYWORDS_RE = re.compile(r'ERROR|INVALID|ABEND|FAILED|NOT AUTHORIZED', re.IGNORECASE)
+
+
+def _fixed_width_rows(screen_content: str, width: int = 80) -> List[str]:
+    """Slice a flat screen buffer into rows of the given width"""
+    return [screen_content[i:i + width] for i in range(0, len(screen_content), width)]
+
+
+def _screen_lines(screen_content: str, width: int = 80) -> List[str]:
+    """Split screen content on newlines, or into fixed-width rows if it has none"""
+    if '\n' in screen_content:
+        return screen_content.split('\n')
+    return _fixed_width_rows(screen_content, width)
+
 
 class ScreenType(Enum):
     """Common mainframe screen types"""
@@ -29,19 +97,34 @@ class ScreenType(Enum):
     MESSAGE = "message"
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class Field:
     """Represents a field on the 3270 screen"""
+    # Attribute bits in flags
+    PROTECTED = 1
+    NUMERIC = 2
+    HIGHLIGHTED = 4
+
     row: int
     col: int
     length: int
-    protected: bool
-    numeric: bool
-    highlighted: bool
     content: str = ""
+    flags: int = 0
+
+    @property
+    def protected(self) -> bool:
+        return bool(self.flags & Field.PROTECTED)
+
+    @property
+    def numeric(self) -> bool:
+        return bool(self.flags & Field.NUMERIC)
 
+    @property
+    def highlighted(self) -> bool:
+        return bool(self.flags & Field.HIGHLIGHTED)
 
-@dataclass
+
+@dataclass(**_DATACLASS_SLOTS)
 class ScreenInfo:
     """Parsed screen information"""
     type: ScreenType
@@ -50,14 +133,29 @@ class ScreenInfo:
     messages: List[str]
     cursor_position: Tuple[int, int]
     raw_content: str
+    lines: Optional[List[str]] = None
+    lines_upper: Optional[List[str]] = None
+
+    def __post_init__(self):
+        # Split and uppercase once here; parser helpers read the rows from these lists
+        if self.lines is None:
+            self.lines = _screen_lines(self.raw_content)
+        if self.lines_upper is None:
+            self.lines_upper = [line.upper() for line in self.lines]
 
 
 class ScreenParser:
     """Parser for 3270 screen content"""
 
-    def __init__(self):
-        """Initialize screen parser"""
-        self.screen_patterns = {
+    def __init__(self, screen_type_order: Optional[List[ScreenType]] = None):
+        """
+        Initialize screen parser
+
+        Args:
+            screen_type_order: Order in which screen types are tried (first to reach
+                its threshold wins); unlisted types follow in the default order
+        """
+        raw_patterns = {
             ScreenType.VTAM_LOGO: [
                 r"Enter LOGON",
                 r"VTAM",
@@ -116,11 +214,65 @@ class ScreenParser:
                 r"IKJ"
             ]
         }
+        self.screen_patterns: Dict[ScreenType, List[re.Pattern]] = {
+            screen_type: [re.compile(p, re.IGNORECASE | re.MULTILINE) for p in patterns]
+            for screen_type, patterns in raw_patterns.items()
+        }
+
+        # All patterns as one zero-width alternation (one named group each), so a
+        # single sweep over the screen finds every position where any of them hits
+        self._labels: List[str] = []
+        self._parse_cache: "OrderedDict[Tuple[str, Tuple[int, int]], ScreenInfo]" = OrderedDict()
+
+        order = list(dict.fromkeys(list(screen_type_order or []) + list(self.screen_patterns)))
+        self._pattern_groups: Dict[ScreenType, List[Tuple[str, re.Pattern]]] = {}
+        alternatives = []
+        for screen_type in order:
+            groups = self._pattern_groups[screen_type] = []
+            for pattern in self.screen_patterns[screen_type]:
+                name = f"g{len(alternatives)}"
+                groups.append((name, pattern))
+                alternatives.append(f"(?P<{name}>{pattern.pattern})")
+        self._combined = re.compile(f"(?=(?:{'|'.join(alternatives)}))", re.IGNORECASE | re.MULTILINE)
+        self._hs_db = self._compile_hyperscan([pattern.pattern for _, pattern in
+                                               (group for groups in self._pattern_groups.values()
+                                                for group in groups)])
+
+    @staticmethod
+    def _compile_hyperscan(expressions: List[str]) -> Optional[Any]:
+        """
+        Compile the screen patterns into one Hyperscan database
+
+        Args:
+            expressions: Pattern sources; pattern i is reported with id i
+
+        Returns:
+            Optional[Any]: Hyperscan database, or None to use the re sweep
+        """
+        if hyperscan is None:
+            return None
+
+        flag = hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_SINGLEMATCH
+        db = hyperscan.Database()
+        try:
+            db.compile(
+                expressions=[expression.encode() for expression in expressions],
+                ids=list(range(len(expressions))),
+                elements=len(expressions),
+                flags=[flag] * len(expressions)
+            )
+        except hyperscan.error as e:
+            logger.warning(f"Hyperscan unavailable for screen patterns, using re: {e}")
+            return None
+        return db
 
     def parse_screen(self, screen_content: str, cursor_pos: Tuple[int, int] = (1, 1)) -> ScreenInfo:
         """
         Parse 3270 screen content
 
+        Unchanged screens are served from a small cache, so the returned
+        ScreenInfo may be shared between calls and should not be modified.
+
         Args:
             screen_content: Raw screen content string
             cursor_pos: Current cursor position
@@ -128,10 +280,27 @@ class ScreenParser:
         Returns:
             ScreenInfo: Parsed screen information
         """
+        if len(screen_content) < _PARSE_CACHE_MIN_LEN:
+            return self._parse_screen(screen_content, cursor_pos)
+
+        key = (screen_content, tuple(cursor_pos))
+        screen_info = self._parse_cache.get(key)
+        if screen_info is not None:
+            self._parse_cache.move_to_end(key)
+            return screen_info
+
+        screen_info = self._parse_screen(screen_content, cursor_pos)
+        self._parse_cache[key] = screen_info
+        if len(self._parse_cache) > _PARSE_CACHE_SIZE:
+            self._parse_cache.popitem(last=False)
+        return screen_info
+
+    def _parse_screen(self, screen_content: str, cursor_pos: Tuple[int, int]) -> ScreenInfo:
+        lines = _screen_lines(screen_content)
         screen_type = self.identify_screen_type(screen_content)
         title = self.extract_title(screen_content)
-        fields = self.extract_fields(screen_content)
-        messages = self.extract_messages(screen_content)
+        fields = self._extract_fields(lines)
+        messages = self._extract_messages(lines)
 
         return ScreenInfo(
             type=screen_type,
@@ -139,7 +308,8 @@ class ScreenParser:
             fields=fields,
             messages=messages,
             cursor_position=cursor_pos,
-            raw_content=screen_content
+            raw_content=screen_content,
+            lines=lines
         )
 
     def identify_screen_type(self, screen_content: str) -> ScreenType:
@@ -152,16 +322,33 @@ class ScreenParser:
         Returns:
             ScreenType: Identified screen type
         """
-        for screen_type, patterns in self.screen_patterns.items():
+        hits = set()
+        positions = []
+        if self._hs_db is not None:
+            # Hyperscan reports every pattern that matches (once each), no re-tests needed
+            def on_match(pattern_id, start, end, flags, context):
+                hits.add(f"g{pattern_id}")
+
+            self._hs_db.scan(screen_content.encode('utf-8', 'replace'), match_event_handler=on_match)
+        else:
+            for match in self._combined.finditer(screen_content):
+                hits.add(match.lastgroup)
+                positions.append(match.start())
+
+        for screen_type, groups in self._pattern_groups.items():
+            # If at least half of patterns match, consider it identified
+            threshold = (len(groups) + 1) // 2
             matches = 0
-            for pattern in patterns:
-                if re.search(pattern, screen_content, re.IGNORECASE | re.MULTILINE):
+            for i, (name, pattern) in enumerate(groups):
+                # Only the first alternative is reported at each position; re-test the
+                # others there so shared patterns (e.g. "Command ===>") still count
+                if name in hits or any(pattern.match(screen_content, pos) for pos in positions):
                     matches += 1
-
-            # If at least half of patterns match, consider it identified
-            if matches >= len(patterns) / 2:
-                logger.debug(f"Identified screen type: {screen_type}")
-                return screen_type
+                    if matches >= threshold:
+                        logger.debug(f"Identified screen type: {screen_type}")
+                        return screen_type
+                elif matches + len(groups) - i - 1 < threshold:
+                    break
 
         return ScreenType.UNKNOWN
 
@@ -180,11 +367,10 @@ class ScreenParser:
             line = line.strip()
             if len(line) > 10 and not line.startswith('*'):
                 # Look for typical title patterns
-                if any(keyword in line.upper() for keyword in
-                       ['ISPF', 'TSO', 'SDSF', 'MENU', 'PANEL', 'VTAM']):
+                if _TITLE_KEYWORDS_RE.search(line):
                     return line
                 # Check if line is mostly uppercase (common for titles)
-                if sum(1 for c in line if c.isupper()) > len(line) * 0.6:
+                if sum(map(str.isupper, line)) > len(line) * 0.6:
                     return line
 
         return ""
@@ -199,35 +385,28 @@ class ScreenParser:
         Returns:
             List[Field]: List of identified fields
         """
+        return self._extract_fields(_screen_lines(screen_content))
+
+    def _extract_fields(self, lines: List[str]) -> List[Field]:
         fields = []
-        lines = screen_content.split('\n') if '\n' in screen_content else self._split_screen_lines(screen_content)
-
-        # Common field patterns
-        field_patterns = [
-            (r'(.*?)===>\s*(.*)$', 'input'),  # ISPF command fields
-            (r'(.*?):\s+_+', 'input'),        # Underscored input fields
-            (r'(.*?):\s*\[.*?\]', 'input'),   # Bracketed fields
-            (r'(.*?)\.{3,}\s*(.*)$', 'input'),  # Dotted fields
-        ]
-
-        for row, line in enumerate(lines, 1):
-            for pattern, field_type in field_patterns:
-                match = re.search(pattern, line)
-                if match:
-                    col = match.start(2) if len(match.groups()) > 1 else match.start()
-                    length = len(match.group(2)) if len(match.groups()) > 1 else 20
-
-                    field = Field(
-                        row=row,
-                        col=col + 1,  # Convert to 1-based
-                        length=max(length, 20),  # Minimum field length
-                        protected=False,
-                        numeric=False,
-                        highlighted=False,
-                        content=match.group(2) if len(match.groups()) > 1 else ""
-                    )
-                    fields.append(field)
-                    break
+        # Offset of each row in the joined screen, to map a match back to its row
+        line_starts = [0]
+        line_starts.extend(accumulate(len(line) + 1 for line in lines[:-1]))
+
+        for match in _FIELD_RE.finditer('\n'.join(lines)):
+            row = bisect_right(line_starts, match.start())
+            group = 'cmd' if match.group('cmd') is not None else 'dot'
+            value = match.group(group)
+            col = (match.start(group) if value is not None else match.start()) - line_starts[row - 1]
+            length = len(value) if value is not None else 20
+
+            field = Field(
+                row=row,
+                col=col + 1,  # Convert to 1-based
+                length=max(length, 20),  # Minimum field length
+                content=value or ""
+            )
+            fields.append(field)
 
         return fields
 
@@ -241,29 +420,17 @@ class ScreenParser:
         Returns:
             List[str]: List of messages
         """
-        messages = []
-        lines = screen_content.split('\n') if '\n' in screen_content else self._split_screen_lines(screen_content)
-
-        # Common message patterns
-        message_patterns = [
-            r'^\*{3}\s+(.+)$',  # TSO messages (*** MESSAGE)
-            r'^IKJ\w+\s+(.+)$',  # TSO messages
-            r'^IEE\w+\s+(.+)$',  # System messages
-            r'^IEF\w+\s+(.+)$',  # Job messages
-            r'^\$HASP\w+\s+(.+)$',  # JES2 messages
-            r'^IST\w+\s+(.+)$',  # VTAM messages
-        ]
+        return self._extract_messages(_screen_lines(screen_content))
 
+    def _extract_messages(self, lines: List[str]) -> List[str]:
+        messages = []
         for line in lines:
             line = line.strip()
-            if not line:
+            if not line.startswith(_MESSAGE_PREFIXES):
                 continue
 
-            for pattern in message_patterns:
-                match = re.match(pattern, line)
-                if match:
-                    messages.append(line)
-                    break
+            if _MESSAGE_RE.match(line):
+                messages.append(line)
 
         return messages
 
@@ -278,10 +445,7 @@ class ScreenParser:
         Returns:
             List[str]: List of screen lines
         """
-        lines = []
-        for i in range(0, len(screen_content), width):
-            lines.append(screen_content[i:i+width])
-        return lines
+        return _fixed_width_rows(screen_content, width)
 
     def find_input_field(self, screen_info: ScreenInfo, label: str) -> Optional[Field]:
         """
@@ -294,18 +458,61 @@ class ScreenParser:
         Returns:
             Optional[Field]: Found field or None
         """
-        label_upper = label.upper()
-        lines = screen_info.raw_content.split('\n') if '\n' in screen_info.raw_content else \
-                self._split_screen_lines(screen_info.raw_content)
+        return self.find_input_fields(screen_info, [label])[label]
+
+    def find_input_fields(self, screen_info: ScreenInfo, labels: List[str]) -> Dict[str, Optional[Field]]:
+        """
+        Find input fields for several labels in one pass over the screen
 
-        for row, line in enumerate(lines, 1):
-            if label_upper in line.upper():
-                # Look for fields on the same line
-                for field in screen_info.fields:
-                    if field.row == row:
-                        return field
+        Args:
+            screen_info: Parsed screen information
+            labels: Field labels to search for
 
-        return None
+        Returns:
+            Dict[str, Optional[Field]]: Found field (or None) for each label
+        """
+        found: Dict[str, Optional[Field]] = {label: None for label in labels}
+        pending = {label: label.upper() for label in labels}
+
+        # First field on each row; only rows holding a field can satisfy a label
+        row_fields: Dict[int, Field] = {}
+        for field in screen_info.fields:
+            row_fields.setdefault(field.row, field)
+
+        for row in sorted(row_fields):
+            if not pending:
+                break
+            if not 1 <= row <= len(screen_info.lines_upper):
+                continue
+            line_upper = screen_info.lines_upper[row - 1]
+            for label, label_upper in list(pending.items()):
+                if label_upper in line_upper:
+                    found[label] = row_fields[row]
+                    del pending[label]
+
+        return found
+
+    def register_labels(self, labels: List[str]):
+        """
+        Register field labels looked up on every screen by find_input_fields_bulk
+
+        Args:
+            labels: Field labels, e.g. "Option", "Data Set Name", "Password"
+        """
+        self._labels = list(dict.fromkeys(self._labels + list(labels)))
+
+    def find_input_fields_bulk(self, screen_info: ScreenInfo) -> Dict[str, Field]:
+        """
+        Find input fields for all registered labels in one pass
+
+        Args:
+            screen_info: Parsed screen information
+
+        Returns:
+            Dict[str, Field]: Field for each registered label present on the screen
+        """
+        found = self.find_input_fields(screen_info, self._labels)
+        return {label: field for label, field in found.items() if field is not None}
 
     def get_command_field(self, screen_info: ScreenInfo) -> Optional[Field]:
         """
@@ -319,7 +526,7 @@ class ScreenParser:
         """
         # Look for common command field patterns
         for field in screen_info.fields:
-            line_content = self._get_line_content(screen_info.raw_content, field.row)
+            line_content = self._get_line_content(screen_info, field.row)
             if '===>' in line_content or 'COMMAND' in line_content.upper():
                 return field
 
@@ -330,19 +537,18 @@ class ScreenParser:
 
         return None
 
-    def _get_line_content(self, screen_content: str, row: int) -> str:
+    def _get_line_content(self, screen_info: ScreenInfo, row: int) -> str:
         """
         Get content of specific screen line
 
         Args:
-            screen_content: Raw screen content
+            screen_info: Parsed screen information
             row: Row number (1-based)
 
         Returns:
             str: Line content
         """
-        lines = screen_content.split('\n') if '\n' in screen_content else \
-                self._split_screen_lines(screen_content)
+        lines = screen_info.lines
 
         if 1 <= row <= len(lines):
             return lines[row - 1]
@@ -361,10 +567,7 @@ class ScreenParser:
         if screen_info.type == ScreenType.ERROR:
             return True
 
-        error_keywords = ['ERROR', 'INVALID', 'ABEND', 'FAILED', 'NOT AUTHORIZED']
-        content_upper = screen_info.raw_content.upper()
-
-        return any(keyword in content_upper for keyword in error_keywords)
+        return _ERROR_KEYWORDS_RE.search(screen_info.raw_content) is not None
 
     def extract_dataset_list(self, screen_content: str) -> List[Dict[str, str]]:
         """
@@ -376,34 +579,39 @@ class ScreenParser:
         Returns:
             List[Dict[str, str]]: List of datasets with properties
         """
-        datasets = []
-        lines = screen_content.split('\n') if '\n' in screen_content else \
-                self._split_screen_lines(screen_content)
+        columns = self.extract_dataset_columns(screen_content)
+        return [dict(zip(_DATASET_COLUMNS, row))
+                for row in zip(*(columns[key] for key in _DATASET_COLUMNS))]
+
+    def extract_dataset_columns(self, screen_content: str) -> Dict[str, List[str]]:
+        """
+        Extract the ISPF dataset list as one list per column
+
+        Args:
+            screen_content: Raw screen content
+
+        Returns:
+            Dict[str, List[str]]: 'name', 'volume', 'dsorg' and 'recfm' lists, index-aligned
+        """
+        columns: Dict[str, List[str]] = {key: [] for key in _DATASET_COLUMNS}
+        if '\n' not in screen_content:
+            screen_content = '\n'.join(_fixed_width_rows(screen_content))
 
         # Look for dataset list pattern (usually starts after header)
-        in_dataset_list = False
-        dataset_pattern = re.compile(r'^([A-Z0-9$#@]+(?:\.[A-Z0-9$#@]+)*)\s+')
+        header = _DATASET_HEADER_RE.search(screen_content)
+        if not header:
+            return columns
 
-        for line in lines:
-            if 'VOLUME' in line.upper() and 'DSORG' in line.upper():
-                in_dataset_list = True
-                continue
+        names, volumes, dsorgs, recfms = (columns[key] for key in _DATASET_COLUMNS)
+        for match in _DATASET_RE.finditer(screen_content, header.end()):
+            # Extract additional info if available
+            parts = match.group(2).split()
+            names.append(match.group(1))
+            volumes.append(parts[0] if parts else '')
+            dsorgs.append(parts[1] if len(parts) > 1 else '')
+            recfms.append(parts[2] if len(parts) > 2 else '')
 
-            if in_dataset_list:
-                match = dataset_pattern.match(line)
-                if match:
-                    dataset_name = match.group(1)
-                    # Extract additional info if available
-                    parts = line.split()
-                    dataset_info = {
-                        'name': dataset_name,
-                        'volume': parts[1] if len(parts) > 1 else '',
-                        'dsorg': parts[2] if len(parts) > 2 else '',
-                        'recfm': parts[3] if len(parts) > 3 else ''
-                    }
-                    datasets.append(dataset_info)
-
-        return datasets
+        return columns
 
     def extract_job_info(self, screen_content: str) -> Optional[Dict[str, str]]:
         """
@@ -415,17 +623,13 @@ class ScreenParser:
         Returns:
             Optional[Dict[str, str]]: Job information or None
         """
-        # Look for job submission patterns
-        job_pattern = re.compile(r'JOB\s+([A-Z0-9]+)\s+.*SUBMITTED')
-        job_number_pattern = re.compile(r'JOB(\d+)')
-
-        match = job_pattern.search(screen_content)
+        match = _JOB_RE.search(screen_content)
         if match:
             job_name = match.group(1)
 
             # Try to find job number
             job_number = None
-            number_match = job_number_pattern.search(screen_content)
+            number_match = _JOB_NUMBER_RE.search(screen_content)
             if number_match:
                 job_number = number_match.group(1)
 